@@ -1,19 +1,59 @@
-from flask import Flask, request, jsonify, render_template
-from flask_login import LoginManager, login_user, login_required, logout_user
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity
-from utils.auth_decorator import dual_auth_required
-from models import db, User, RiskAssessment
-from config import Config
-from utils.data_loader import load_china_data, load_international_data, load_trends_data
-from utils.risk_calculator import calculate_risk_score
+from utils.auth_decorator import dual_auth_required, admin_required
+from models import db, User, RiskAssessment, ANSWER_COLUMNS, FACTOR_SCORE_COLUMNS, init_engines, upgrade_schema
+from config import get_config
+from utils.data_loader import china_index, load_china_data, load_international_data, load_trends_data, dataset_cache
+from utils.risk_calculator import assess_batch, determine_risk_level
+from utils.risk_table import ensure_risk_table, lookup_risk_scores, risk_table_stats
+from utils.response_cache import materialized, response_cache, send_materialized
+from utils.dashboard import build_dashboard, parse_known_versions, parse_panels
+from utils.assessment_writer import assessment_writer
+from utils.identity_cache import identity_cache
+from utils.token_cache import token_cache
+from utils.password_hasher import password_hasher, HasherBusyError
+from utils.user_import import conflict_message, import_users, read_user_file
+from utils.db_routing import replica_reads, replica_router
+from utils.risk_service import assess_and_record
+from utils.log_config import init_logging, logging_stats
+from utils.json_provider import JSONProvider
+from utils.compression import response_compressor
+from utils.static_assets import build_assets, is_fingerprinted, static_assets
+from utils.ingestion import INGEST_MODES, SOURCE_FORMATS, IngestionError, ingest, iter_source_rows, source_format
+from utils.assessment_export import EXPORT_FORMATS, export_watermark, iter_export
+from utils.pagination import (InvalidQueryParameter, decode_cursor, encode_cursor, parse_datetime,
+                              parse_fields, parse_limit)
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.exc import IntegrityError
+import click
 import json
+import logging
+import os
+import sqlite3
+import sys
+import zlib
 from collections import defaultdict
-from datetime import datetime
 
-def create_app():
+# 风险评估历史可选返回字段
+HISTORY_FIELDS = ('id', 'risk_score', 'risk_percentage', 'risk_level', 'assessment_date', 'factors')
+
+# 跨域配置（asgi.py 中的异步路由按相同配置添加响应头）
+CORS_OPTIONS = {
+    'supports_credentials': True,
+    'resources': {"/*": {"origins": "*"}},
+    'expose_headers': ["X-Export-Watermark"]
+}
+
+logger = logging.getLogger(__name__)
+
+def create_app(config_name=None):
+    """创建应用，config_name 为 development/production/testing，默认读取环境变量 APP_ENV"""
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(get_config(config_name))
+    app.json = JSONProvider(app)
+    init_logging(app)
     
     # 额外的会话配置，确保跨域请求中会话正常工作
     app.config['SESSION_COOKIE_SAMESITE'] = 'None'
@@ -22,7 +62,17 @@ def create_app():
     
     # 初始化扩展
     db.init_app(app)
-    CORS(app, supports_credentials=True, resources={"/*": {"origins": "*"}})
+    init_engines(app)
+    replica_router.init_app(app)
+    dataset_cache.check_interval = app.config['DATASET_CHECK_INTERVAL']
+    assessment_writer.init_app(app)
+    identity_cache.init_app(app)
+    token_cache.init_app(app)
+    password_hasher.init_app(app)
+    response_compressor.init_app(app)
+    static_assets.init_app(app)
+    ensure_risk_table()
+    CORS(app, **CORS_OPTIONS)
     
     # 初始化JWT管理 - 配置兼容性选项
     jwt = JWTManager(app)
@@ -38,24 +88,25 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return identity_cache.get(int(user_id))
     
     # JWT用户身份加载器
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        return User.query.get(identity)
+        return identity_cache.get(int(identity))
     
     # 确保Flask-Login能够识别JWT认证的用户
     @jwt.user_identity_loader
     def user_identity_lookup(identity):
         # 处理传入的用户对象或用户ID
+        # PyJWT 2.10起要求sub为字符串
         if hasattr(identity, 'id'):
             # 如果传入的是用户对象，返回其ID
-            return identity.id
+            return str(identity.id)
         else:
             # 如果传入的已经是用户ID，直接返回
-            return identity
+            return str(identity)
     
     # JWT错误处理
     @jwt.expired_token_loader
@@ -79,6 +130,11 @@ def create_app():
             "message": "请在请求头中添加有效的Authorization令牌"
         }), 401
     
+    # 密码哈希任务排队已满（注册/登录高峰）
+    @app.errorhandler(HasherBusyError)
+    def hasher_busy(e):
+        return jsonify({"error": "服务繁忙，请稍后重试"}), 503
+    
     # 路由定义
     @app.route('/')
     def index():
@@ -89,10 +145,13 @@ def create_app():
     def register():
         data = request.get_json()
         
-        if User.query.filter_by(username=data['username']).first():
+        # 先用一次索引查询排除已占用的用户名/邮箱，重复注册不进入密码哈希（哈希线程池有限，被重复请求占满时会返回503）
+        taken = db.session.query(User.username, User.email).filter(
+            or_(User.username == data['username'], User.email == data['email'])
+        ).all()
+        if any(username == data['username'] for username, _ in taken):
             return jsonify({"error": "用户名已存在"}), 400
-        
-        if User.query.filter_by(email=data['email']).first():
+        if taken:
             return jsonify({"error": "邮箱已存在"}), 400
         
         user = User(
@@ -101,11 +160,35 @@ def create_app():
         )
         user.set_password(data['password'])
         
+        # 查询与提交之间的并发注册由唯一约束兜底
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            return jsonify({"error": conflict_message(e)}), 400
         
         return jsonify({"message": "注册成功"}), 201
     
+    @app.route('/api/register/batch', methods=['POST'])
+    @dual_auth_required(claims_only=True)
+    @admin_required
+    def register_batch():
+        """
+        批量注册用户（机构批量开通账号，仅管理员）
+        - 请求体为用户数组，或 {"users": [...]}，每条包含 username、email、password
+        - 返回逐行错误报告，部分失败不影响其他用户的创建
+        """
+        data = request.get_json(silent=True)
+        records = data.get('users') if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return jsonify({"error": "请求体必须是用户数组"}), 400
+        max_records = app.config['USER_IMPORT_MAX_RECORDS']
+        if len(records) > max_records:
+            return jsonify({"error": f"单次最多导入{max_records}个用户"}), 413
+        
+        return jsonify(import_users(records, app.config['USER_IMPORT_CHUNK_SIZE']))
+    
     @app.route('/api/login', methods=['GET', 'POST'])
     def login():
         if request.method == 'GET':
@@ -126,11 +209,21 @@ def create_app():
         user = User.query.filter_by(username=data['username']).first()
     
         if user and user.check_password(data['password']):
+            # 存储的哈希算法或成本已过时，用本次提交的明文按当前配置重新计算
+            if user.password_needs_rehash():
+                user.set_password(data['password'])
+                db.session.commit()
+                password_hasher.record_rehash()
+            
             # 保留Flask-Login的登录状态（保持兼容性）
             login_user(user, remember=True)
             
             # 使用用户ID作为JWT的identity，因为User对象不能直接JSON序列化
-            access_token = create_access_token(identity=user.id)
+            # username和资料版本号写入声明，供 claims_only 路由免查数据库
+            access_token = create_access_token(identity=user.id, additional_claims={
+                'username': user.username,
+                'pv': user.profile_version()
+            })
             # 返回用户信息和访问令牌
             return jsonify({
                 "message": "登录成功",
@@ -195,6 +288,7 @@ def create_app():
         }), 400
     
     @app.route('/api/user/profile', methods=['POST', 'PUT'])
+    @replica_reads(methods=['POST'])
     @dual_auth_required
     def user_profile():
         if request.method == 'POST':
@@ -217,23 +311,28 @@ def create_app():
             current_user.height = data.get('height', current_user.height)
             current_user.family_history = data.get('family_history', current_user.family_history)
             
+            # 提交后identity_cache中该用户的缓存自动失效
             db.session.commit()
             return jsonify({"message": "个人信息更新成功"})
     
     # 数据API路由
     @app.route('/api/data/china')
+    @materialized('china')
     def china_data():
-        return jsonify(load_china_data())
+        return load_china_data()
     
     @app.route('/api/data/international')
+    @materialized('international')
     def international_data():
-        return jsonify(load_international_data())
+        return load_international_data()
     
     @app.route('/api/data/trends')
+    @materialized('trends')
     def trends_data():
-        return jsonify(load_trends_data())
+        return load_trends_data()
     
     @app.route('/api/data/trends/simple', methods=['GET'])
+    @materialized()
     def get_trends_data():
         # 这里可以从数据库或文件中获取真实数据
         trends_data = {
@@ -242,19 +341,20 @@ def create_app():
             "source": "国际糖尿病联盟",
             "last_updated": "2023-11-15"
         }
-        return jsonify(trends_data)
+        return trends_data
     
     @app.route('/api/data/complications')
+    @materialized()
     def complications_data():
         # 示例并发症数据
-        return jsonify({
+        return {
             "complications": [
                 {"name": "视网膜病变", "prevalence": 23.5, "severity": "high"},
                 {"name": "肾病", "prevalence": 18.2, "severity": "high"},
                 {"name": "神经病变", "prevalence": 15.8, "severity": "medium"},
                 {"name": "心血管疾病", "prevalence": 32.1, "severity": "high"}
             ]
-        })
+        }
     
     # 风险评估路由 - 未登录可直接测评
     @app.route('/api/risk/assess', methods=['POST'])
@@ -265,165 +365,267 @@ def create_app():
         - 接收7个关键健康指标
         - 返回风险评分、等级和个性化建议
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
         try:
             data = request.get_json()
-            
-            if not data:
-                logger.warning("风险评估请求体为空")
-                return jsonify({"error": "请求体不能为空，需要提供JSON格式数据"}), 400
-            
-            # 请求体验证
-            required_fields = [
-                'age_range', 'bmi_category', 'waist_status',
-                'family_history', 'physical_activity', 
-                'blood_pressure', 'glucose_history'
-            ]
-            
-            # 检查必填字段
-            missing_fields = [field for field in required_fields if field not in data]
-            if missing_fields:
-                logger.warning(f"风险评估缺少必填字段: {missing_fields}")
-                return jsonify({"error": f"缺少必填字段: {', '.join(missing_fields)}"}), 400
-            
-            # 检查字段值的有效性
-            validation_errors = []
-            
-            valid_age_ranges = ["20-39", "40-49", "50-59", "60-69", "70+"]
-            if data['age_range'] not in valid_age_ranges:
-                validation_errors.append({"field": "age_range", "message": "无效的年龄范围，可选值: 20-39, 40-49, 50-59, 60-69, 70+"})
-            
-            valid_bmi_categories = ["underweight", "normal", "overweight", "obese"]
-            if data['bmi_category'] not in valid_bmi_categories:
-                validation_errors.append({"field": "bmi_category", "message": "无效的BMI分类，可选值: underweight, normal, overweight, obese"})
-            
-            valid_waist_statuses = ["normal-male", "normal-female", "abnormal-male", "abnormal-female"]
-            if data['waist_status'] not in valid_waist_statuses:
-                validation_errors.append({"field": "waist_status", "message": "无效的腰围状态，可选值: normal-male, normal-female, abnormal-male, abnormal-female"})
-            
-            valid_binary_answers = ["yes", "no"]
-            if data['family_history'] not in valid_binary_answers:
-                validation_errors.append({"field": "family_history", "message": "家族病史必须是'yes'或'no'"})
-            if data['blood_pressure'] not in valid_binary_answers:
-                validation_errors.append({"field": "blood_pressure", "message": "高血压必须是'yes'或'no'"})
-            if data['glucose_history'] not in valid_binary_answers:
-                validation_errors.append({"field": "glucose_history", "message": "血糖异常史必须是'yes'或'no'"})
-            
-            valid_activity_levels = ["regular", "irregular", "sedentary"]
-            if data['physical_activity'] not in valid_activity_levels:
-                validation_errors.append({"field": "physical_activity", "message": "无效的运动频率，可选值: regular, irregular, sedentary"})
-            
-            if validation_errors:
-                logger.warning(f"风险评估输入验证失败: {validation_errors}")
-                return jsonify({"errors": validation_errors}), 400
-            
-            # 计算风险评分
-            result = calculate_risk_score(data)
-            
-            # 保存评估结果（未登录用户不绑定user_id）
-            assessment = RiskAssessment(
-                user_id=None,
-                risk_score=result['risk_score'],
-                risk_level=result['risk_level'],
-                factors=json.dumps({
-                    'risk_factors': result['risk_factors'],
-                    'assessment_date': result.get('assessment_date', datetime.utcnow().isoformat())
-                })
-            )
-            db.session.add(assessment)
-            db.session.commit()
-            
-            # 添加评估时间和评估ID
-            result['assessment_date'] = datetime.utcnow().isoformat()
-            result['assessment_id'] = assessment.id  # 返回评估记录ID，便于前端追踪
-            
-            logger.info(f"风险评估完成，评分: {result['risk_score']}，等级: {result['risk_level']}")
-            return jsonify(result)
         except Exception as e:
-            logger.error(f"风险评估过程中发生错误: {str(e)}")
-            db.session.rollback()
+            logger.exception("风险评估过程中发生错误: %s", e)
             return jsonify({"error": "评估过程中发生错误，请稍后重试"}), 500
+        
+        payload, status = assess_and_record(data)
+        return jsonify(payload), status
+    
+    @app.route('/api/risk/assess/batch', methods=['POST'])
+    def assess_risk_batch():
+        """
+        批量评估糖尿病风险（供筛查合作机构上传问卷）
+        - 请求体为JSON数组或 {"records": [...]}，也可使用 application/x-ndjson 每行一条
+        - 以NDJSON流式返回，每行包含记录序号 index 和评估结果（或错误信息）
+        - 评估结果与 /api/risk/assess 的评分部分完全一致，批量结果不写入数据库
+        """
+        max_records = app.config['ASSESSMENT_BATCH_MAX_RECORDS']
+        
+        if request.mimetype == 'application/x-ndjson':
+            def read_ndjson(stream):
+                for line in stream:
+                    if line.strip():
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            # 无法解析的行按无效记录处理，继续处理后续行
+                            yield line
+            records = read_ndjson(request.stream)
+        else:
+            data = request.get_json(silent=True)
+            records = data.get('records') if isinstance(data, dict) else data
+            if not isinstance(records, list):
+                return jsonify({"error": "请求体必须是JSON数组或包含records数组的对象"}), 400
+            if len(records) > max_records:
+                return jsonify({"error": f"超过单次批量评估上限（{max_records}条）"}), 413
+        
+        def generate():
+            for item in assess_batch(records, app.config['ASSESSMENT_BATCH_CHUNK_SIZE'], max_records,
+                                     score=lookup_risk_scores):
+                yield app.json.dumps(item) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
     @app.route('/api/risk/history')
-    @dual_auth_required
+    @replica_reads
+    @dual_auth_required(claims_only=True)
     def risk_history():
-        assessments = RiskAssessment.query.filter_by(user_id=current_user.id)\
-            .order_by(RiskAssessment.assessment_date.desc()).all()
+        """
+        分页获取当前用户的风险评估历史（按评估时间倒序）
+        - limit: 每页条数，默认20，最大100
+        - cursor: 上一页返回的 next_cursor（基于 assessment_date, id 的键集分页）
+        - fields: 逗号分隔的返回字段，不需要 factors 时不会读取和解析该列
+        - start / end: 评估时间范围过滤（ISO格式，包含start，不包含end）
+        """
+        try:
+            limit = parse_limit(request.args.get('limit'), app.config['RISK_HISTORY_PAGE_SIZE'],
+                                app.config['RISK_HISTORY_MAX_PAGE_SIZE'])
+            fields = parse_fields(request.args.get('fields'), HISTORY_FIELDS, HISTORY_FIELDS)
+            start = parse_datetime(request.args.get('start'), 'start')
+            end = parse_datetime(request.args.get('end'), 'end')
+            cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        except InvalidQueryParameter as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # 只查询需要的列，排序键始终查询以生成游标
+        columns = [RiskAssessment.id, RiskAssessment.assessment_date, RiskAssessment.risk_score, RiskAssessment.risk_level]
+        if 'factors' in fields:
+            columns.append(RiskAssessment.factors)
+            columns += [getattr(RiskAssessment, column) for column in ANSWER_COLUMNS]
+            columns += [getattr(RiskAssessment, column) for column in FACTOR_SCORE_COLUMNS.values()]
+        
+        query = db.session.query(*columns).filter(RiskAssessment.user_id == current_user.id)
+        if start is not None:
+            query = query.filter(RiskAssessment.assessment_date >= start)
+        if end is not None:
+            query = query.filter(RiskAssessment.assessment_date < end)
+        if cursor is not None:
+            cursor_date, cursor_id = cursor
+            query = query.filter(or_(
+                RiskAssessment.assessment_date < cursor_date,
+                and_(RiskAssessment.assessment_date == cursor_date, RiskAssessment.id < cursor_id)
+            ))
+        rows = query.order_by(RiskAssessment.assessment_date.desc(), RiskAssessment.id.desc())\
+            .limit(limit + 1).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
         # 构建响应数据
         history = []
-        for a in assessments:
-            factors_data = json.loads(a.factors) if a.factors else {}
-            
-            # 处理不同版本的数据格式
-            risk_factors = factors_data.get('risk_factors', factors_data)
-            
-            # 计算风险百分比（如果没有存储）
-            risk_percentage = 0
-            if a.risk_score >= 17:
-                risk_percentage = min(95 + (a.risk_score - 17) * 1, 100)
-            elif a.risk_score >= 10:
-                risk_percentage = 40 + (a.risk_score - 10) * 5
-            else:
-                risk_percentage = min(20 + a.risk_score * 2, 39)
-            
-            history.append({
+        for a in rows:
+            item = {
                 'id': a.id,
                 'risk_score': a.risk_score,
-                'risk_percentage': risk_percentage,
+                'risk_percentage': determine_risk_level(a.risk_score)[1],
                 'risk_level': a.risk_level,
-                'assessment_date': a.assessment_date.isoformat(),
-                'factors': risk_factors
-            })
+                'assessment_date': a.assessment_date.isoformat()
+            }
+            if 'factors' in fields:
+                if a.factors:
+                    factors_data = json.loads(a.factors)
+                    # 处理不同版本的数据格式
+                    item['factors'] = factors_data.get('risk_factors', factors_data)
+                else:
+                    item['factors'] = RiskAssessment.structured_factors(a)
+            history.append({field: item[field] for field in fields})
+        
+        return jsonify({
+            'items': history,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(rows[-1].assessment_date, rows[-1].id) if has_more else None
+        })
+    
+    @app.route('/api/risk/export')
+    @replica_reads
+    @dual_auth_required(claims_only=True)
+    @admin_required
+    def export_assessments():
+        """
+        流式导出风险评估记录（供数据分析使用）
+        - format: ndjson（默认）或 csv
+        - since: 只导出提交顺序号大于该值的记录，用于增量拉取
+        - 响应头 X-Export-Watermark 为本次导出的截止顺序号，作为下次的since
+        """
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"不支持的导出格式，可选值: {', '.join(EXPORT_FORMATS)}"}), 400
+        try:
+            since = int(request.args.get('since', 0))
+        except ValueError:
+            return jsonify({"error": "since必须是整数"}), 400
         
-        return jsonify(history)
+        watermark = export_watermark()
+        chunks = iter_export(export_format, since, watermark, app.config['EXPORT_BATCH_SIZE'])
+        response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format])
+        response.headers['X-Export-Watermark'] = str(watermark)
+        response.headers['Content-Disposition'] = f'attachment; filename=risk_assessments_{since}_{watermark}.{export_format}'
+        return response
+    
+    @app.route('/api/risk/statistics')
+    @replica_reads
+    @dual_auth_required(claims_only=True)
+    @admin_required
+    def risk_statistics():
+        """按风险等级及各风险因素统计评估记录数量（在数据库内聚合）"""
+        by_level = db.session.query(RiskAssessment.risk_level, func.count())\
+            .group_by(RiskAssessment.risk_level).all()
+        by_activity = db.session.query(RiskAssessment.risk_level, RiskAssessment.activity_score, func.count())\
+            .group_by(RiskAssessment.risk_level, RiskAssessment.activity_score).all()
+        
+        # 该项得分大于0即视为存在该风险因素；各因素在同一次扫描中按风险等级计数
+        factors = list(FACTOR_SCORE_COLUMNS)
+        present_counts = db.session.query(RiskAssessment.risk_level, *[
+            func.count(case((getattr(RiskAssessment, FACTOR_SCORE_COLUMNS[factor]) > 0, 1)))
+            for factor in factors
+        ]).group_by(RiskAssessment.risk_level).all()
+        
+        return jsonify({
+            'by_level': {level: count for level, count in by_level},
+            'by_level_and_activity_score': [
+                {'risk_level': level, 'activity_score': score, 'count': count}
+                for level, score, count in by_activity
+            ],
+            'factor_present_by_level': {
+                factor: {row[0]: row[position] for row in present_counts if row[position]}
+                for position, factor in enumerate(factors, start=1)
+            }
+        })
     
     # 健康检查路由
     @app.route('/api/health')
     def health_check():
         return jsonify({"status": "healthy", "service": "diabetes-visualization-api"})
     
+    @app.route('/api/metrics')
+    @dual_auth_required(claims_only=True)
+    @admin_required
+    def metrics():
+        """运行时缓存与队列指标"""
+        return jsonify({
+            'datasets': dataset_cache.stats(),
+            'responses': response_cache.stats(),
+            'assessment_writer': assessment_writer.stats(),
+            'risk_table': risk_table_stats(),
+            'identity_cache': identity_cache.stats(),
+            'token_cache': token_cache.stats(),
+            'password_hasher': password_hasher.stats(),
+            'db_routing': replica_router.stats(),
+            'compression': response_compressor.stats(),
+            'logging': logging_stats()
+        })
+    
     # 详细数据路由
     @app.route('/api/data/china/detailed')
+    @materialized('china')
     def china_detailed_data():
         """获取详细的中国省份数据"""
         data = load_china_data()
-        return jsonify(data)
+        return data
 
     @app.route('/api/data/international/detailed')
+    @materialized('international')
     def international_detailed_data():
         """获取详细的国际数据"""
         data = load_international_data()
-        return jsonify(data)
+        return data
 
     @app.route('/api/data/trends/detailed')
+    @materialized('trends')
     def trends_detailed_data():
         """获取详细的趋势数据"""
         data = load_trends_data()
-        return jsonify(data)
+        return data
 
     @app.route('/api/data/regions/<region_name>')
+    @materialized('china')
     def region_data(region_name):
         """获取特定区域的数据"""
-        china_data = load_china_data()
-        if region_name in china_data.get('regions', {}):
-            region_provinces = china_data['regions'][region_name]
-            provinces_data = [p for p in china_data['provinces'] if p['name'] in region_provinces]
-            return jsonify({
+        index = china_index()
+        if region_name in index.regions:
+            return {
                 'region': region_name,
-                'provinces': provinces_data,
-                'summary': {
-                    'total_population': sum(p['population'] for p in provinces_data),
-                    'total_cases': sum(p['cases'] for p in provinces_data),
-                    'avg_rate': round(sum(p['diabetes_rate'] for p in provinces_data) / len(provinces_data), 2)
-                }
-            })
+                'provinces': index.regions[region_name],
+                'summary': index.region_summaries[region_name]
+            }
         return jsonify({'error': 'Region not found'}), 404
     
+    @app.route('/api/data/<dataset>/ingest', methods=['POST'])
+    @dual_auth_required(claims_only=True)
+    @admin_required
+    def ingest_dataset(dataset):
+        """
+        导入数据集（仅管理员）
+        - 表单字段 file 为CSV或XLSX源文件，逐行读取、校验，并增量计算汇总和区域汇总
+        - mode: merge（默认，按名称新增或替换记录）或 replace（只保留本次导入的记录）
+        - dry_run=true 只校验不发布；allow_errors=true 跳过错误行，否则存在错误时不发布（返回422）
+        - 发布时原子替换数据文件，所有进程在下次检查数据文件时加载新版本，无需重启
+        """
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "请上传源文件（表单字段 file）"}), 400
+        mode = request.values.get('mode', 'merge')
+        if mode not in INGEST_MODES:
+            return jsonify({"error": f"mode可选值: {', '.join(INGEST_MODES)}"}), 400
+        dry_run = request.values.get('dry_run', 'false').lower() == 'true'
+        allow_errors = request.values.get('allow_errors', 'false').lower() == 'true'
+        
+        try:
+            report = ingest(dataset, iter_source_rows(upload.stream, source_format(upload.filename)),
+                            os.path.basename(upload.filename or 'upload'), mode=mode, allow_errors=allow_errors,
+                            dry_run=dry_run, max_rows=app.config['DATASET_INGEST_MAX_ROWS'])
+        except IngestionError as e:
+            return jsonify({"error": str(e)}), 400
+        if report['errors'] and not allow_errors and not dry_run:
+            return jsonify(report), 422
+        return jsonify(report)
+    
     # 为糖尿病数据可视化应用添加新的API端点
     @app.route('/api/continent-data', methods=['GET'])
+    @materialized('international')
     def get_continent_data():
         """获取大洲数据（用于饼图）"""
         international_data = load_international_data()
@@ -446,9 +648,10 @@ def create_app():
                 {'name': '南极洲', 'value': 0, 'tooltip': '南极洲 (无数据)'}
             ]
             result = default_continents
-        return jsonify(result)
+        return result
 
     @app.route('/api/continents-data', methods=['GET'])
+    @materialized('international')
     def get_continents_data():
         """获取大洲数据（用于柱状图）"""
         international_data = load_international_data()
@@ -468,12 +671,13 @@ def create_app():
             continents = ['亚洲', '非洲', '北美洲', '南美洲', '欧洲', '大洋洲']
             rates = [60, 10.5, 10.4, 9.4, 8.1, 12.3]
         
-        return jsonify({
+        return {
             'xAxis': continents,
             'seriesData': rates
-        })
+        }
 
     @app.route('/api/country-data', methods=['GET'])
+    @materialized('international')
     def get_country_data():
         """获取国家数据（用于世界地图）"""
         # 从国际数据中提取国家信息
@@ -504,17 +708,18 @@ def create_app():
         for continent, continent_countries in continent_to_countries.items():
             rate = continent_rates.get(continent, 5.0)
             for country in continent_countries:
-                # 为不同国家添加一些变化，使数据更真实
-                country_rate = rate + (hash(country) % 10 - 5) * 0.5
+                # 为不同国家添加一些变化，使数据更真实（使用稳定哈希，保证各进程输出一致）
+                country_rate = rate + (zlib.crc32(country.encode('utf-8')) % 10 - 5) * 0.5
                 countries.append({
                     'name': country,
                     'value': max(0, country_rate),  # 确保不小于0
                     'continent': continent
                 })
         
-        return jsonify(countries)
+        return countries
 
     @app.route('/api/countries-data', methods=['GET'])
+    @materialized('international')
     def get_countries_data():
         """获取国家数据（用于世界地图）"""
         # 从国际数据中提取国家信息
@@ -545,17 +750,18 @@ def create_app():
         for continent, continent_countries in continent_to_countries.items():
             rate = continent_rates.get(continent, 5.0)
             for country in continent_countries:
-                # 为不同国家添加一些变化，使数据更真实
-                country_rate = rate + (hash(country) % 10 - 5) * 0.5
+                # 为不同国家添加一些变化，使数据更真实（使用稳定哈希，保证各进程输出一致）
+                country_rate = rate + (zlib.crc32(country.encode('utf-8')) % 10 - 5) * 0.5
                 countries.append({
                     'name': country,
                     'value': max(0, country_rate),  # 确保不小于0
                     'continent': continent
                 })
         
-        return jsonify(countries)
+        return countries
 
     @app.route('/api/age-distribution', methods=['GET'])
+    @materialized()
     def get_age_distribution():
         """获取年龄分布数据（用于柱状图）"""
         # 提供年龄分布数据
@@ -569,12 +775,13 @@ def create_app():
         xAxis = [row[0] for row in age_data]
         seriesData = [row[1] for row in age_data]
         
-        return jsonify({
+        return {
             'xAxis': xAxis,
             'seriesData': seriesData
-        })
+        }
 
     @app.route('/api/gender-ratio', methods=['GET'])
+    @materialized()
     def get_gender_ratio():
         """获取性别比例数据（用于饼图）"""
         # 提供性别比例数据
@@ -583,9 +790,10 @@ def create_app():
             {'name': '女性', 'value': 48}
         ]
         
-        return jsonify(gender_data)
+        return gender_data
 
     @app.route('/api/blood-sugar-trend', methods=['GET'])
+    @materialized('trends')
     def get_blood_sugar_trend():
         """获取血糖趋势数据（用于折线图）"""
         trends_data = load_trends_data()
@@ -599,12 +807,13 @@ def create_app():
             xAxis = ['1990', '2015', '2017', '2019', '2022']
             seriesData = [7, 8.4, 8.3, 9.3, 14]
         
-        return jsonify({
+        return {
             'xAxis': xAxis,
             'seriesData': seriesData
-        })
+        }
 
     @app.route('/api/geo-distribution', methods=['GET'])
+    @materialized('international')
     def get_geo_distribution():
         """获取地理分布数据（七大洲占比）"""
         continent_data = load_international_data().get('continents', [])
@@ -619,13 +828,14 @@ def create_app():
                 {'name': '欧洲', 'value': 8.1},
                 {'name': '大洋洲', 'value': 12.3}
             ]
-            return jsonify(default_data)
+            return default_data
         
         # 排除南极洲（无数据）
         result = [{'name': c['name'], 'value': c['diabetes_rate']} for c in continent_data if c['name'] != '南极洲']
-        return jsonify(result)
+        return result
 
     @app.route('/api/health-tips', methods=['GET'])
+    @materialized()
     def get_health_tips():
         """获取健康提示信息"""
         tips = [
@@ -636,10 +846,11 @@ def create_app():
             "充足的睡眠有助于维持正常的血糖代谢",
             "减少压力，学习放松技巧如冥想、瑜伽等"
         ]
-        return jsonify(tips)
+        return tips
     
     # 省份数据接口
     @app.route('/api/provinces/data', methods=['GET'])
+    @materialized('china')
     def get_provinces_data():
         """获取所有省份基础数据（用于地图）"""
         china_data = load_china_data()
@@ -651,16 +862,14 @@ def create_app():
             for province in provinces_data
         ]
         
-        return jsonify(map_data)
+        return map_data
     
     @app.route('/api/provinces/<province>/details', methods=['GET'])
+    @materialized('china')
     def get_province_details(province):
         """获取特定省份详细数据"""
-        china_data = load_china_data()
-        provinces_data = china_data.get('provinces', [])
-        
         # 查找指定省份
-        province_data = next((p for p in provinces_data if p['name'] == province), None)
+        province_data = china_index().provinces.get(province)
         
         if not province_data:
             return jsonify({'error': 'Province not found'}), 404
@@ -688,7 +897,7 @@ def create_app():
         # 每年略微增长
         trend_values = [base_rate * (1 + (i * 0.01)) for i in range(len(years))]
         
-        return jsonify({
+        return {
             'province': province,
             'ageDistribution': {
                 'ranges': age_ranges,
@@ -699,23 +908,14 @@ def create_app():
                 'years': years,
                 'values': trend_values
             }
-        })
+        }
     
     @app.route('/api/provinces/national-summary', methods=['GET'])
+    @materialized('china')
     def get_national_summary():
         """获取全国汇总数据"""
-        china_data = load_china_data()
-        provinces_data = china_data.get('provinces', [])
-        
-        # 计算全国平均患病率
-        if provinces_data:
-            avg_rate = sum(p['diabetes_rate'] for p in provinces_data) / len(provinces_data)
-            total_population = sum(p.get('population', 0) for p in provinces_data)
-            total_cases = sum(p.get('cases', 0) for p in provinces_data)
-        else:
-            avg_rate = 8.8
-            total_population = 1400000000
-            total_cases = 123200000
+        # 全国平均患病率等汇总在数据加载时预先计算
+        summary = china_index().national_summary
         
         # 生成全国年龄分布数据
         age_ranges = ["18-29", "30-39", "40-49", "50-59", "60-69", "70+"]
@@ -731,13 +931,8 @@ def create_app():
         years = ["2019", "2020", "2021", "2022", "2023"]
         trend_values = [8.8, 9.0, 9.2, 9.5, 9.8]  # 全国平均趋势
         
-        return jsonify({
-            'summary': {
-                'average_rate': avg_rate,
-                'total_population': total_population,
-                'total_cases': total_cases,
-                'provinces_count': len(provinces_data)
-            },
+        return {
+            'summary': summary,
             'ageDistribution': {
                 'ranges': age_ranges,
                 'values': age_values
@@ -747,7 +942,128 @@ def create_app():
                 'years': years,
                 'values': trend_values
             }
-        })
+        }
+    
+    @app.route('/api/dashboard', methods=['GET'])
+    def dashboard():
+        """
+        聚合数据接口：一次请求返回多个面板
+        - panels：逗号分隔的面板名，省略时返回全部面板
+        - known：客户端已有的面板版本（面板:版本,...），版本未变化的面板不重复返回数据
+        """
+        try:
+            panels = parse_panels(request.args.get('panels'))
+        except InvalidQueryParameter as e:
+            return jsonify({"error": str(e)}), 400
+        return send_materialized(build_dashboard(panels, parse_known_versions(request.args.get('known'))))
+    
+    # 前端静态资源
+    @app.route('/app/', defaults={'filename': 'index.html'})
+    @app.route('/app/<path:filename>')
+    def frontend_asset(filename):
+        """前端页面和资源：按Accept-Encoding返回预压缩文件，带内容哈希的资源长期缓存"""
+        asset = static_assets.get(filename)
+        if asset is None:
+            return jsonify({'error': 'Not found'}), 404
+        response = send_materialized(asset)
+        if is_fingerprinted(filename):
+            static_assets.apply_immutable(response)
+        return response
+    
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """构建前端静态资源：css/js加内容哈希，生成gzip/brotli预压缩文件"""
+        stats = build_assets(app.config['STATIC_SOURCE_DIR'], app.config['STATIC_BUILD_DIR'])
+        print("✅ 已构建 %(files)d 个文件（%(fingerprinted)d 个带哈希），原始 %(bytes)d 字节，"
+              "gzip %(gz_bytes)d 字节，brotli %(br_bytes)d 字节" % stats)
+    
+    @app.cli.command('ingest-dataset')
+    @click.argument('name')
+    @click.argument('source', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(SOURCE_FORMATS), default=None,
+                  help='文件格式，默认按扩展名判断')
+    @click.option('--mode', type=click.Choice(INGEST_MODES), default='merge',
+                  help='merge: 按名称新增或替换记录；replace: 只保留本次导入的记录')
+    @click.option('--allow-errors', is_flag=True, help='跳过校验失败的行，仍然发布')
+    @click.option('--dry-run', is_flag=True, help='只校验，不发布')
+    @click.option('--report', type=click.File('w', encoding='utf-8'), default='-', help='错误报告输出文件，默认标准输出')
+    def ingest_dataset_command(name, source, file_format, mode, allow_errors, dry_run, report):
+        """从CSV/XLSX源文件导入数据集，校验通过后原子发布新版本"""
+        with open(source, 'rb') as stream:
+            try:
+                result = ingest(name, iter_source_rows(stream, file_format or source_format(source)),
+                                os.path.basename(source), mode=mode, allow_errors=allow_errors, dry_run=dry_run,
+                                max_rows=app.config['DATASET_INGEST_MAX_ROWS'])
+            except IngestionError as e:
+                raise click.ClickException(str(e))
+        for error in result['errors']:
+            report.write(json.dumps(error, ensure_ascii=False) + '\n')
+        print(f"导入完成: 共{result['rows']}行，新增{result['inserted']}条，更新{result['updated']}条，"
+              f"失败{result['failed']}条", file=sys.stderr)
+        print(f"汇总: {json.dumps(result['summary'], ensure_ascii=False)}", file=sys.stderr)
+        for region, summary in (result['regions'] or {}).items():
+            print(f"  {region}: {json.dumps(summary, ensure_ascii=False)}", file=sys.stderr)
+        if result['published']:
+            print(f"✅ 已发布 {name} 版本 {result['version']}（原版本 {result['previous_version']}）", file=sys.stderr)
+        elif result['version']:
+            print("数据未变化，未发布新版本", file=sys.stderr)
+        elif dry_run:
+            print("未发布（--dry-run）", file=sys.stderr)
+        elif result['failed']:
+            print("存在校验错误，未发布，请修正后重新导入或使用 --allow-errors", file=sys.stderr)
+        else:
+            print("没有有效记录，未发布", file=sys.stderr)
+    
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """创建缺失的表并执行结构升级"""
+        db.create_all()
+        upgrade_schema()
+        print("✅ 数据库结构已更新")
+    
+    @app.cli.command('sync-replica')
+    def sync_replica_command():
+        """将SQLite主库复制到从库文件（本地模拟主从复制，用于测试读写分离）"""
+        if 'replica' not in db.engines:
+            raise click.ClickException("未配置 DATABASE_REPLICA_URL")
+        primary, replica = db.engines[None], db.engines['replica']
+        if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            raise click.ClickException("仅支持SQLite，其他数据库请使用数据库自身的复制功能")
+        source = sqlite3.connect(primary.url.database)
+        target = sqlite3.connect(replica.url.database)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        print(f"✅ 已同步 {primary.url.database} -> {replica.url.database}")
+    
+    @app.cli.command('import-users')
+    @click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--format', 'file_format', type=click.Choice(['csv', 'json', 'ndjson']), default=None,
+                  help='文件格式，默认按扩展名判断')
+    @click.option('--report', type=click.File('w', encoding='utf-8'), default='-', help='错误报告输出文件，默认标准输出')
+    def import_users_command(source, file_format, report):
+        """从CSV/JSON/NDJSON文件批量导入用户"""
+        if file_format is None:
+            extension = source.name.rsplit('.', 1)[-1].lower()
+            file_format = extension if extension in ('csv', 'json', 'ndjson') else 'csv'
+        result = import_users(read_user_file(source, file_format), app.config['USER_IMPORT_CHUNK_SIZE'])
+        for error in result['errors']:
+            report.write(json.dumps(error, ensure_ascii=False) + '\n')
+        print(f"导入完成: 共{result['total']}条，成功{result['created']}条，失败{result['failed']}条", file=sys.stderr)
+    
+    @app.cli.command('export-assessments')
+    @click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+    @click.option('--since', type=int, default=0, help='只导出提交顺序号大于该值的记录')
+    @click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='输出文件，默认标准输出')
+    def export_assessments_command(export_format, since, output):
+        """流式导出风险评估记录"""
+        watermark = export_watermark()
+        for chunk in iter_export(export_format, since, watermark, app.config['EXPORT_BATCH_SIZE']):
+            output.write(chunk)
+        # 截止顺序号输出到标准错误，避免混入导出内容
+        print(f"导出完成，下次增量导出使用 --since {watermark}", file=sys.stderr)
     
     return app
 
@@ -756,5 +1072,6 @@ if __name__ == '__main__':
     
     with app.app_context():
         db.create_all()  # 创建数据库表
+        upgrade_schema()  # 为已有数据库补充索引等结构变更
         
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+ASGI入口
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --backlog 4096
+
+- 预渲染的数据接口（@materialized）在事件循环中直接从内存返回，不占用线程，
+  单进程即可维持大量keep-alive连接；数据文件的检查（stat）和重新加载在线程池中进行，不阻塞事件循环
+- /api/risk/assess 异步读取请求体，评分和写入提交在有界线程池中执行
+- 其他路由原样交给Flask应用处理（在独立的线程池中运行WSGI）
+"""
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header, parse_etags
+from app import CORS_OPTIONS, create_app
+from utils.assessment_writer import assessment_writer
+from utils.response_cache import cache_key, current_dataset_version, dataset_version, response_cache, send_materialized
+from utils.risk_service import assess_and_record
+
+class PooledWsgiToAsgi:
+    """
+    WSGI转ASGI适配器，WSGI应用在 max_workers 个线程中并发运行
+    （asgiref 的 WsgiToAsgi 默认在单个共享线程中运行，会使所有Flask请求串行）
+    """
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body', False):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+
+            def sync_send(message):
+                # 在工作线程中调用，等待事件循环发送完成
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+            await loop.run_in_executor(self.executor, self.run_wsgi_app, scope, body, sync_send)
+
+    @staticmethod
+    def build_environ(scope, body):
+        script_name = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+        path_info = scope['path'].encode('utf-8').decode('latin-1')
+        if path_info.startswith(script_name):
+            path_info = path_info[len(script_name):]
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': script_name,
+            'PATH_INFO': path_info,
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': 'HTTP/%s' % scope['http_version'],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1')
+            if name == 'content-length':
+                key = 'CONTENT_LENGTH'
+            elif name == 'content-type':
+                key = 'CONTENT_TYPE'
+            else:
+                key = 'HTTP_' + name.upper().replace('-', '_')
+            value = value.decode('latin-1')
+            # 同名请求头按WSGI约定以逗号合并
+            environ[key] = environ[key] + ',' + value if key in environ else value
+        return environ
+
+    def run_wsgi_app(self, scope, body, send):
+        """在线程池中运行WSGI应用，响应头在第一段响应体产生时发送"""
+        response_start = None
+        started = False
+
+        def start_response(status, headers, exc_info=None):
+            nonlocal response_start
+            if exc_info is not None and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+            }
+
+        iterable = self.wsgi_application(self.build_environ(scope, body), start_response)
+        try:
+            for chunk in iterable:
+                if not chunk:
+                    continue
+                if not started:
+                    started = True
+                    send(response_start)
+                send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not started:
+                send(response_start)
+            send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+
+class AsyncApplication:
+    """ASGI应用：热点路由异步处理，其余请求交给Flask"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.fallback = PooledWsgiToAsgi(flask_app, config['ASGI_WSGI_THREADS'])
+        self.url_adapter = flask_app.url_map.bind('localhost')
+        self.db_executor = ThreadPoolExecutor(max_workers=config['ASGI_DB_THREADS'], thread_name_prefix='asgi-db')
+        self.db_slots = None  # asyncio.Semaphore 需在事件循环中创建
+        self.max_pending = config['ASGI_DB_MAX_PENDING']
+        self.acquire_timeout = config['ASGI_DB_ACQUIRE_TIMEOUT']
+        self.max_body_size = config['ASGI_MAX_BODY_SIZE']
+        self.cors_expose_headers = ', '.join(CORS_OPTIONS['expose_headers'])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http':
+            method, path = scope['method'], scope['path']
+            if method == 'GET' or method == 'HEAD':
+                endpoint, view_args, datasets = self.match_materialized(path)
+                if datasets is not None and await self.serve_materialized(scope, send, endpoint, view_args, datasets):
+                    return
+            elif method == 'POST' and path == '/api/risk/assess':
+                return await self.assess_risk(scope, receive, send)
+        await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.db_slots = asyncio.Semaphore(self.max_pending)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # 写入队列中剩余的评估结果
+                await asyncio.get_running_loop().run_in_executor(None, assessment_writer.stop)
+                self.db_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def match_materialized(self, path):
+        try:
+            endpoint, view_args = self.url_adapter.match(path, method='GET')
+        except HTTPException:
+            # 404/405/重定向交给Flask生成标准响应
+            return None, None, None
+        view = self.flask_app.view_functions[endpoint]
+        return endpoint, view_args, getattr(view, 'materialized_datasets', None)
+
+    async def serve_materialized(self, scope, send, endpoint, view_args, datasets):
+        """缓存命中时直接发送，返回False表示未命中（由Flask渲染并写入缓存）"""
+        version = current_dataset_version(datasets)
+        if version is None:
+            # 到了检查间隔：stat数据文件，文件变化时还要解析重新加载，均在线程中进行
+            version = await asyncio.get_running_loop().run_in_executor(None, dataset_version, datasets)
+        cached = response_cache.lookup(cache_key(endpoint, view_args), version)
+        if cached is None:
+            return False
+        headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        with self.flask_app.app_context():
+            response = send_materialized(
+                cached, endpoint,
+                accept_encodings=parse_accept_header(headers.get('Accept-Encoding')),
+                if_none_match=parse_etags(headers.get('If-None-Match'))
+            )
+        await self.send_response(send, response, headers, head=scope['method'] == 'HEAD')
+        return True
+
+    async def assess_risk(self, scope, receive, send):
+        headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if len(body) > self.max_body_size:
+                return await self.send_json(send, {"error": "请求体过大"}, 413, headers)
+
+        # 非JSON请求体交给Flask路由处理，保持错误响应一致
+        data = None
+        if headers.get('Content-Type', '').split(';')[0].strip() == 'application/json':
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+        if data is None:
+            return await self.fallback(scope, self.replay(body), send)
+
+        if self.db_slots is None:
+            # 服务器未发送lifespan事件时在首次使用时创建
+            self.db_slots = asyncio.Semaphore(self.max_pending)
+        try:
+            await asyncio.wait_for(self.db_slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            return await self.send_json(send, {"error": "服务繁忙，请稍后重试"}, 503, headers)
+        try:
+            payload, status = await asyncio.get_running_loop().run_in_executor(self.db_executor, self.run_assessment, data)
+        finally:
+            self.db_slots.release()
+        await self.send_json(send, payload, status, headers)
+
+    def run_assessment(self, data):
+        with self.flask_app.app_context():
+            return assess_and_record(data)
+
+    @staticmethod
+    def replay(body):
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {'type': 'http.disconnect'}
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        return receive
+
+    async def send_json(self, send, payload, status, request_headers):
+        # 与jsonify输出完全一致
+        response = self.flask_app.json.response(payload)
+        response.status_code = status
+        await self.send_response(send, response, request_headers)
+
+    async def send_response(self, send, response, request_headers, head=False):
+        origin = request_headers.get('Origin')
+        if origin:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+            response.headers['Access-Control-Expose-Headers'] = self.cors_expose_headers
+            response.vary.add('Origin')
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response.headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': b'' if head else response.get_data()})
+
+
+def create_asgi_app(config_name=None):
+    return AsyncApplication(create_app(config_name))
+
+
+application = create_asgi_app()
@@ -0,0 +1,54 @@
+"""
+数据集加载基准：对比 json.loads 与 orjson.loads 解析数据文件
+
+用法（在 backend 目录下）:
+    python benchmarks/dataset_loading.py --scale 100 --number 20
+
+将各数据集中的记录列表（省份、大洲等）复制 --scale 倍，模拟加入区县级、逐年数据后的规模，
+输出JSON文件大小以及 json.loads、orjson.loads（已安装时）的单次耗时（毫秒）。
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.data_loader import dataset_cache
+from utils.json_provider import orjson
+
+
+def scaled(data, scale):
+    """将记录列表复制 scale 倍，名称加序号以免字符串全部重复"""
+    result = {}
+    for key, value in data.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict) and 'name' in value[0]:
+            value = [dict(row, name='%s-%d' % (row['name'], i)) for i in range(scale) for row in value]
+        result[key] = value
+    return result
+
+
+def measure(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100, help='记录列表的放大倍数')
+    parser.add_argument('--number', type=int, default=20, help='每项测量的加载次数')
+    args = parser.parse_args()
+
+    print('%-14s %10s %12s %12s' % ('dataset', 'json B', 'json ms', 'orjson ms'))
+    for name in dataset_cache.names():
+        with open(dataset_cache.path(name), 'rb') as f:
+            data = scaled(json.loads(f.read()), args.scale)
+        raw = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+        json_ms = measure(lambda: json.loads(raw), args.number)
+        orjson_ms = measure(lambda: orjson.loads(raw), args.number) if orjson is not None else float('nan')
+        print('%-14s %10d %12.2f %12.2f' % (name, len(raw), json_ms, orjson_ms))
+
+
+if __name__ == '__main__':
+    main()
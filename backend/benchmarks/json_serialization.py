@@ -0,0 +1,96 @@
+"""
+JSON序列化基准：对比Flask默认设置（ensure_ascii）、标准库UTF-8输出和orjson
+
+用法（在 backend 目录下）:
+    python benchmarks/json_serialization.py --number 2000
+
+对主要数据接口的响应数据、单次风险评估结果和一页评估历史分别序列化，
+输出每种实现的单次耗时（微秒）、响应体大小和gzip压缩后的大小。
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from utils.json_provider import orjson
+from utils.questionnaire import questionnaire
+from utils.risk_table import lookup_risk_score
+
+ENDPOINTS = ['china_data', 'international_data', 'get_countries_data', 'get_provinces_data',
+             'get_national_summary', 'get_health_tips']
+
+
+def sample_payloads(app):
+    """主要接口的响应数据（视图函数返回值），以及评估结果和评估历史"""
+    payloads = {}
+    with app.test_request_context():
+        for endpoint in ENDPOINTS:
+            payloads[endpoint] = app.view_functions[endpoint].__wrapped__()
+    answers = {q.field: q.options[-1].value for q in questionnaire.questions}
+    result = dict(lookup_risk_score(answers), assessment_date=datetime.utcnow().isoformat(), assessment_id=1)
+    payloads['assess_risk'] = result
+    started = datetime(2025, 1, 1)
+    payloads['risk_history'] = {
+        'history': [
+            dict(id=i, risk_score=result['risk_score'], risk_level=result['risk_level'],
+                 risk_percentage=result['risk_percentage'], factors=result['risk_factors'],
+                 assessment_date=(started + timedelta(hours=i)).isoformat())
+            for i in range(50)
+        ],
+        'next_cursor': 'MjAyNS0wMS0wM1QwMTowMDowMHw0OQ'
+    }
+    return payloads
+
+
+def encoders():
+    default = DefaultJSONProvider.default
+    result = {
+        'json (ensure_ascii)': lambda obj: json.dumps(
+            obj, default=default, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('utf-8'),
+        'json (utf-8)': lambda obj: json.dumps(
+            obj, default=default, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8'),
+    }
+    if orjson is not None:
+        options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        result['orjson'] = lambda obj: orjson.dumps(obj, default=default, option=options)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000, help='每项测量的序列化次数')
+    args = parser.parse_args()
+
+    app = create_app()
+    payloads = sample_payloads(app)
+    if orjson is None:
+        print('未安装orjson，只对比标准库实现')
+
+    print('%-22s %-20s %12s %10s %10s' % ('endpoint', 'encoder', 'us/op', 'bytes', 'gzip'))
+    totals = {}
+    for endpoint, payload in payloads.items():
+        for name, encode in encoders().items():
+            body = encode(payload)
+            seconds = min(timeit.repeat(lambda: encode(payload), number=args.number, repeat=3))
+            us = seconds / args.number * 1e6
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            totals.setdefault(name, [0.0, 0, 0])
+            totals[name][0] += us
+            totals[name][1] += len(body)
+            totals[name][2] += gzipped
+            print('%-22s %-20s %12.1f %10d %10d' % (endpoint, name, us, len(body), gzipped))
+    print()
+    for name, (us, size, gzipped) in totals.items():
+        print('%-22s %-20s %12.1f %10d %10d' % ('total', name, us, size, gzipped))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+风险评估请求校验微基准：对比原先逐请求构建列表的校验方式与编译后的问卷校验
+
+用法（在 backend 目录下）:
+    python benchmarks/questionnaire_validation.py --number 200000
+
+输出每种实现处理合法请求和非法请求的单次耗时（纳秒），
+以及 校验+评分 整条路径（validate+lookup 与 validate_and_encode+lookup_key）的耗时。
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.questionnaire import questionnaire
+from utils.risk_table import ensure_risk_table, lookup_risk_key, lookup_risk_score
+
+REQUIRED_FIELDS = ['age_range', 'bmi_category', 'waist_status', 'family_history',
+                   'physical_activity', 'blood_pressure', 'glucose_history']
+
+
+def legacy_validate(data):
+    """原 assess_risk 中的校验逻辑：每次请求重新构建可选值列表并线性查找"""
+    if not data:
+        return {"error": "请求体不能为空，需要提供JSON格式数据"}
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in data]
+    if missing_fields:
+        return {"error": f"缺少必填字段: {', '.join(missing_fields)}"}
+
+    validation_errors = []
+    valid_age_ranges = ["20-39", "40-49", "50-59", "60-69", "70+"]
+    if data['age_range'] not in valid_age_ranges:
+        validation_errors.append({"field": "age_range", "message": "无效的年龄范围，可选值: 20-39, 40-49, 50-59, 60-69, 70+"})
+    valid_bmi_categories = ["underweight", "normal", "overweight", "obese"]
+    if data['bmi_category'] not in valid_bmi_categories:
+        validation_errors.append({"field": "bmi_category", "message": "无效的BMI分类，可选值: underweight, normal, overweight, obese"})
+    valid_waist_statuses = ["normal-male", "normal-female", "abnormal-male", "abnormal-female"]
+    if data['waist_status'] not in valid_waist_statuses:
+        validation_errors.append({"field": "waist_status", "message": "无效的腰围状态，可选值: normal-male, normal-female, abnormal-male, abnormal-female"})
+    valid_binary_answers = ["yes", "no"]
+    if data['family_history'] not in valid_binary_answers:
+        validation_errors.append({"field": "family_history", "message": "家族病史必须是'yes'或'no'"})
+    if data['blood_pressure'] not in valid_binary_answers:
+        validation_errors.append({"field": "blood_pressure", "message": "高血压必须是'yes'或'no'"})
+    if data['glucose_history'] not in valid_binary_answers:
+        validation_errors.append({"field": "glucose_history", "message": "血糖异常史必须是'yes'或'no'"})
+    valid_activity_levels = ["regular", "irregular", "sedentary"]
+    if data['physical_activity'] not in valid_activity_levels:
+        validation_errors.append({"field": "physical_activity", "message": "无效的运动频率，可选值: regular, irregular, sedentary"})
+    if validation_errors:
+        return {"errors": validation_errors}
+    return None
+
+
+def legacy_path(data):
+    if legacy_validate(data) is None:
+        return lookup_risk_score(data)
+
+
+def compiled_path(data):
+    key, error = questionnaire.validate_and_encode(data)
+    if error is None:
+        return lookup_risk_key(key)
+
+
+def measure(fn, data, number):
+    seconds = min(timeit.repeat(lambda: fn(data), number=number, repeat=3))
+    return seconds / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200000, help='每项测量的调用次数')
+    args = parser.parse_args()
+
+    ensure_risk_table()
+    # 取每个字段最后一个可选值，线性查找时为最坏情况
+    valid = {q.field: q.options[-1].value for q in questionnaire.questions}
+    invalid = dict(valid, bmi_category='unknown', glucose_history='maybe')
+
+    rows = [
+        ('legacy validate', legacy_validate),
+        ('questionnaire.validate', questionnaire.validate),
+        ('questionnaire.validate_and_encode', questionnaire.validate_and_encode),
+        ('legacy validate + lookup', legacy_path),
+        ('validate_and_encode + lookup_key', compiled_path),
+    ]
+    print('%-36s %14s %14s' % ('', 'valid (ns)', 'invalid (ns)'))
+    for name, fn in rows:
+        print('%-36s %14.0f %14.0f' % (name, measure(fn, valid, args.number), measure(fn, invalid, args.number)))
+
+
+if __name__ == '__main__':
+    main()
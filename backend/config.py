@@ -7,9 +7,169 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'database.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # 只读从库（可选）：配置后标记为只读的路由从从库读取
+    SQLALCHEMY_BINDS = {'replica': os.environ['DATABASE_REPLICA_URL']} if os.environ.get('DATABASE_REPLICA_URL') else {}
+    DB_REPLICA_STICKY_SECONDS = float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))   # 用户写入后读主库的时长
+    
+    # 数据库连接池（SQLAlchemy 2对SQLite文件数据库默认使用QueuePool）
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_pre_ping': False
+    }
+    # SQLite连接参数，在每个新建的连接上执行 PRAGMA；其他数据库忽略
+    # WAL模式下读写互不阻塞；synchronous=NORMAL 在WAL模式下仍保证数据库一致性，只在掉电时可能丢失最近的事务
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),   # 毫秒
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 16384)),        # 负数表示KB
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+        'temp_store': 'MEMORY'
+    }
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
     # JWT配置
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-jwt-secret-key-here'
     JWT_TOKEN_LOCATION = ['headers']
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_VERIFY_CACHE_SIZE = int(os.environ.get('JWT_VERIFY_CACHE_SIZE', 4096))  # 已验证令牌缓存容量
+    
+    # 管理员用户名（逗号分隔），用于运行指标、数据导出等管理接口
+    ADMIN_USERNAMES = frozenset(name.strip() for name in os.environ.get('ADMIN_USERNAMES', '').split(',') if name.strip())
+    
+    # 密码哈希：算法和成本（werkzeug格式），计算进程数（0为在请求线程中计算），
+    # 同时等待的任务上限（0为进程数的4倍）及排队超时（秒）
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0))
+    PASSWORD_HASH_ACQUIRE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_ACQUIRE_TIMEOUT', 2.0))
+    
+    # 日志：级别、异步队列容量，以及DEBUG级别下按路由抽样的比例和每分钟上限
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0.1))
+    LOG_DEBUG_PER_MINUTE = int(os.environ.get('LOG_DEBUG_PER_MINUTE', 60))
+    
+    # JSON序列化：安装了orjson时是否使用（输出与标准库实现一致，均为UTF-8紧凑格式）
+    JSON_ACCELERATED = os.environ.get('JSON_ACCELERATED', 'true').lower() == 'true'
+    
+    # 数据集缓存：检查数据文件是否变化的最小间隔（秒）
+    DATASET_CHECK_INTERVAL = float(os.environ.get('DATASET_CHECK_INTERVAL', 1.0))
+    # 数据集导入：单次导入的最大行数
+    DATASET_INGEST_MAX_ROWS = int(os.environ.get('DATASET_INGEST_MAX_ROWS', 100000))
+    
+    # HTTP缓存策略：按endpoint名称覆盖默认策略
+    # 可选项: max_age, s_maxage, stale_while_revalidate, stale_if_error, private, no_store
+    HTTP_CACHE_DEFAULT_POLICY = {
+        'max_age': int(os.environ.get('HTTP_CACHE_MAX_AGE', 60)),
+        'stale_while_revalidate': int(os.environ.get('HTTP_CACHE_STALE_WHILE_REVALIDATE', 300))
+    }
+    HTTP_CACHE_POLICIES = {
+        # 不依赖数据文件的固定数据
+        'get_trends_data': {'max_age': 3600, 'stale_while_revalidate': 86400},
+        'complications_data': {'max_age': 3600, 'stale_while_revalidate': 86400},
+        'get_age_distribution': {'max_age': 3600, 'stale_while_revalidate': 86400},
+        'get_gender_ratio': {'max_age': 3600, 'stale_while_revalidate': 86400},
+        'get_health_tips': {'max_age': 3600, 'stale_while_revalidate': 86400},
+        # 前端页面每次通过ETag重新验证；带内容哈希的资源由路由单独设置为immutable
+        'frontend_asset': {'max_age': 0, 'stale_while_revalidate': 0}
+    }
+    
+    # 响应压缩：对不小于 COMPRESSION_MIN_SIZE 字节的文本响应按Accept-Encoding动态压缩（br需安装brotli）
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+    COMPRESSION_MIMETYPES = (
+        'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html', 'text/css',
+        'text/javascript', 'application/javascript', 'image/svg+xml'
+    )
+    
+    # 前端静态资源：源目录和构建目录（flask build-assets 生成哈希文件名和预压缩文件），带哈希资源的缓存时长
+    STATIC_SOURCE_DIR = os.environ.get('STATIC_SOURCE_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'frontend')
+    STATIC_BUILD_DIR = os.environ.get('STATIC_BUILD_DIR') or os.path.join(STATIC_SOURCE_DIR, 'dist')
+    STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', 31536000))
+    
+    # 风险评估结果异步批量写入
+    ASSESSMENT_WRITE_BEHIND = os.environ.get('ASSESSMENT_WRITE_BEHIND', 'true').lower() == 'true'
+    ASSESSMENT_QUEUE_SIZE = int(os.environ.get('ASSESSMENT_QUEUE_SIZE', 10000))     # 队列容量（内存上限）
+    ASSESSMENT_FLUSH_SIZE = int(os.environ.get('ASSESSMENT_FLUSH_SIZE', 500))       # 单次批量写入的最大条数
+    ASSESSMENT_FLUSH_INTERVAL = float(os.environ.get('ASSESSMENT_FLUSH_INTERVAL', 0.5))  # 最长等待时间（秒）
+    ASSESSMENT_ENQUEUE_TIMEOUT = float(os.environ.get('ASSESSMENT_ENQUEUE_TIMEOUT', 0.05))  # 队列满时的最长阻塞时间（秒）
+    ASSESSMENT_ID_BLOCK = int(os.environ.get('ASSESSMENT_ID_BLOCK', 1000))         # 每次预留的ID数量
+    
+    # ASGI模式（asgi.py）：数据库任务线程数、排队上限及等待超时（秒），运行Flask路由的线程数，请求体上限（字节）
+    ASGI_DB_THREADS = int(os.environ.get('ASGI_DB_THREADS', 16))
+    ASGI_DB_MAX_PENDING = int(os.environ.get('ASGI_DB_MAX_PENDING', 1000))
+    ASGI_DB_ACQUIRE_TIMEOUT = float(os.environ.get('ASGI_DB_ACQUIRE_TIMEOUT', 1.0))
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 32))
+    ASGI_MAX_BODY_SIZE = int(os.environ.get('ASGI_MAX_BODY_SIZE', 64 * 1024))
+    
+    # 批量风险评估
+    ASSESSMENT_BATCH_MAX_RECORDS = int(os.environ.get('ASSESSMENT_BATCH_MAX_RECORDS', 50000))
+    ASSESSMENT_BATCH_CHUNK_SIZE = int(os.environ.get('ASSESSMENT_BATCH_CHUNK_SIZE', 1000))
+    
+    # 风险评估历史分页
+    RISK_HISTORY_PAGE_SIZE = 20
+    RISK_HISTORY_MAX_PAGE_SIZE = 100
+    
+    # 已认证用户缓存：容量（用户数）和有效期（秒）
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 1024))
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL', 30))
+    
+    # 批量导入用户：单次请求的最大用户数，每个事务写入的用户数
+    USER_IMPORT_MAX_RECORDS = int(os.environ.get('USER_IMPORT_MAX_RECORDS', 10000))
+    USER_IMPORT_CHUNK_SIZE = int(os.environ.get('USER_IMPORT_CHUNK_SIZE', 500))
+    
+    # 评估记录导出
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+
+class DevelopmentConfig(Config):
+    """开发环境：沿用默认配置"""
+
+
+class ProductionConfig(Config):
+    """生产环境：更大的连接池和页缓存"""
+    SQLALCHEMY_ENGINE_OPTIONS = dict(
+        Config.SQLALCHEMY_ENGINE_OPTIONS,
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        pool_recycle=3600
+    )
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        cache_size=-int(os.environ.get('SQLITE_CACHE_KB', 65536)),
+        mmap_size=int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    )
+
+
+class TestingConfig(Config):
+    """测试环境：同步写入、快速哈希，数据库可通过 TEST_DATABASE_URL 指定"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'test.db')
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, synchronous='OFF')
+    ASSESSMENT_WRITE_BEHIND = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
+
+
+def get_config(name=None):
+    """按名称（默认读取环境变量 APP_ENV）选择配置类"""
+    name = name or os.environ.get('APP_ENV', 'development')
+    try:
+        return config_by_name[name]
+    except KeyError:
+        raise ValueError("未知的运行环境: %s（可选: %s）" % (name, ', '.join(config_by_name)))
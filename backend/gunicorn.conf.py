@@ -0,0 +1,71 @@
+"""
+gunicorn生产配置（pre-fork）
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+- preload_app：应用和数据集只在主进程中加载一次，工作进程fork后共享
+- 主进程每隔 DATASET_WATCH_INTERVAL 秒检查数据文件，变化时在主进程中重新解析并预渲染，
+  然后向自身发送SIGHUP：gunicorn 先用新数据启动新的工作进程，再平滑关闭旧进程，期间不中断服务
+- 工作进程数、线程数、超时和 max_requests 回收均可通过环境变量配置
+"""
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# 处理一定数量的请求后回收工作进程，jitter避免所有进程同时重启
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+preload_app = True
+wsgi_app = 'wsgi:application'
+
+dataset_watch_interval = float(os.environ.get('DATASET_WATCH_INTERVAL', 5))
+
+
+def _watch_datasets(server):
+    from wsgi import application, reload_lock
+    from utils.data_loader import dataset_cache
+    from utils.response_cache import warm_materialized
+
+    versions = dataset_cache.versions()
+    while True:
+        time.sleep(dataset_watch_interval)
+        try:
+            with reload_lock:
+                current = dataset_cache.versions()
+                if current == versions:
+                    continue
+                warmed = warm_materialized(application)
+        except Exception:
+            server.log.exception("检查数据集更新失败")
+            continue
+        server.log.info("数据集已更新 %s -> %s，已预渲染%d个接口，平滑重启工作进程", versions, current, warmed)
+        versions = current
+        os.kill(server.pid, signal.SIGHUP)
+
+
+def when_ready(server):
+    if dataset_watch_interval > 0:
+        threading.Thread(target=_watch_datasets, args=(server,), name='dataset-watcher', daemon=True).start()
+
+
+def post_fork(server, worker):
+    from wsgi import application
+    from models import db
+    from utils.data_loader import dataset_cache
+
+    # fork前主进程的连接池不能在子进程中复用
+    with application.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    if dataset_watch_interval > 0:
+        # 数据集更新由主进程统一处理，工作进程不再检查文件
+        dataset_cache.check_interval = float('inf')
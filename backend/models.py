@@ -1,19 +1,35 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+from utils.password_hasher import password_hasher
+from utils.db_routing import replica_router
 from flask_login import UserMixin
 from datetime import datetime
 import json
 
+class RoutingSession(Session):
+    """读写分离会话：只读路由中的SELECT发往 replica 引擎，其余语句发往主库（见 utils/db_routing.py）"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and 'replica' in self._db.engines:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                replica_router.record_write()
+            elif getattr(clause, 'is_select', False) and replica_router.use_replica():
+                return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 # 初始化数据库实例
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     """用户模型"""
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     age = db.Column(db.Integer)
     gender = db.Column(db.String(20))
     weight = db.Column(db.Float)
@@ -26,12 +42,21 @@ class User(UserMixin, db.Model):
     assessments = db.relationship('RiskAssessment', backref='user', lazy=True)
     
     def set_password(self, password):
-        """设置用户密码"""
-        self.password_hash = generate_password_hash(password)
+        """设置用户密码（按 PASSWORD_HASH_METHOD 配置的算法）"""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """检查用户密码是否正确"""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """存储的密码哈希算法或成本已过时"""
+        return password_hasher.needs_rehash(self.password_hash)
+    
+    def profile_version(self):
+        """资料版本号（updated_at的毫秒时间戳），资料每次更新后变化，写入JWT声明"""
+        updated_at = self.updated_at or self.created_at
+        return int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000) if updated_at else 0
     
     def get_bmi(self):
         """计算BMI指数"""
@@ -55,22 +80,300 @@ class User(UserMixin, db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+# 问卷答案列：字段名 -> 是否为是/否问题（存储为布尔值）
+ANSWER_COLUMNS = {
+    'age_range': False,
+    'bmi_category': False,
+    'waist_status': False,
+    'family_history': True,
+    'physical_activity': False,
+    'blood_pressure': True,
+    'glucose_history': True
+}
+# 风险因素 -> 得分列
+FACTOR_SCORE_COLUMNS = {
+    'age': 'age_score',
+    'bmi': 'bmi_score',
+    'waist': 'waist_score',
+    'family': 'family_score',
+    'activity': 'activity_score',
+    'blood_pressure': 'blood_pressure_score',
+    'glucose': 'glucose_score'
+}
+
 class RiskAssessment(db.Model):
     """风险评估模型"""
+    __table_args__ = (
+        # 历史记录按用户过滤、按评估时间排序分页
+        db.Index('ix_risk_assessment_user_date', 'user_id', 'assessment_date'),
+        # 按风险等级和生活方式的统计查询
+        # 统计接口按 (风险等级, 运动得分) 分组，索引覆盖该查询，无需回表
+        db.Index('ix_risk_assessment_level_activity_score', 'risk_level', 'activity_score'),
+        # 增量导出按提交顺序号读取
+        db.Index('ix_risk_assessment_created_seq', 'created_seq', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # 提交顺序号：在写入事务中分配（见 reserve_commit_seq），按提交先后递增，用作增量导出的水位；
+    # 异步写入的ID在提交前按进程预分配，ID的大小与提交先后无关
+    created_seq = db.Column(db.Integer)
+    # 未登录用户的评估记录不绑定用户
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     risk_score = db.Column(db.Integer, nullable=False)
     risk_level = db.Column(db.String(20), nullable=False)
+    # 旧版本记录的风险因素JSON；新记录使用下方的结构化列，该列为空
     factors = db.Column(db.Text)
     assessment_date = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 问卷答案（旧记录由迁移回填，无法还原的答案为空）
+    age_range = db.Column(db.String(8))
+    bmi_category = db.Column(db.String(16))
+    waist_status = db.Column(db.String(16))
+    family_history = db.Column(db.Boolean)
+    physical_activity = db.Column(db.String(16))
+    blood_pressure = db.Column(db.Boolean)
+    glucose_history = db.Column(db.Boolean)
+    
+    # 各风险因素得分
+    age_score = db.Column(db.SmallInteger)
+    bmi_score = db.Column(db.SmallInteger)
+    waist_score = db.Column(db.SmallInteger)
+    family_score = db.Column(db.SmallInteger)
+    activity_score = db.Column(db.SmallInteger)
+    blood_pressure_score = db.Column(db.SmallInteger)
+    glucose_score = db.Column(db.SmallInteger)
+    
+    @staticmethod
+    def structured_fields(answers, risk_factors):
+        """根据问卷答案和评分结果生成结构化列的值"""
+        fields = {
+            column: answers[column] == 'yes' if is_binary else answers[column]
+            for column, is_binary in ANSWER_COLUMNS.items()
+        }
+        for factor, column in FACTOR_SCORE_COLUMNS.items():
+            fields[column] = risk_factors[factor]['score']
+        return fields
+    
+    @staticmethod
+    def structured_factors(record):
+        """
+        由结构化列还原风险因素字典（与评估接口返回的risk_factors一致）
+        record 可以是模型对象或包含同名列的查询结果行
+        """
+        if record.age_score is None:
+            return {}
+        answers = {
+            column: ('yes' if getattr(record, column) else 'no') if is_binary else getattr(record, column)
+            for column, is_binary in ANSWER_COLUMNS.items()
+        }
+        if all(value is not None for value in answers.values()):
+            from utils.risk_table import lookup_risk_score
+            return lookup_risk_score(answers)['risk_factors']
+        return {factor: {'score': getattr(record, column)} for factor, column in FACTOR_SCORE_COLUMNS.items()}
+    
     def to_dict(self):
         """将风险评估对象转换为字典格式"""
+        if self.factors:
+            factors = json.loads(self.factors)
+        elif self.age_score is not None:
+            # 与旧记录中factors列保存的结构保持一致
+            factors = {
+                'risk_factors': self.structured_factors(self),
+                'assessment_date': self.assessment_date.isoformat()
+            }
+        else:
+            factors = {}
         return {
             'id': self.id,
             'user_id': self.user_id,
             'risk_score': self.risk_score,
             'risk_level': self.risk_level,
-            'factors': json.loads(self.factors) if self.factors else {},
+            'factors': factors,
             'assessment_date': self.assessment_date.isoformat()
-        }
\ No newline at end of file
+        }
+
+class IdSequence(db.Model):
+    """主键预分配序列，供批量异步写入提前分配ID；评估记录的提交顺序号也保存在这里"""
+    __tablename__ = 'id_sequence'
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
+
+COMMIT_SEQUENCE = 'risk_assessment.created_seq'
+
+def reserve_commit_seq(connection, count=1):
+    """
+    在调用方的写入事务中预留 count 个连续的提交顺序号，返回第一个
+    更新序列行会锁定该行（SQLite锁定整个数据库）直到事务结束，其他写入事务要等本事务提交或回滚后才能取号，
+    因此顺序号的大小与提交先后一致；事务回滚时预留随之撤销
+    """
+    table = IdSequence.__table__
+    for _ in range(3):
+        updated = connection.execute(
+            table.update()
+            .where(table.c.name == COMMIT_SEQUENCE)
+            .values(next_value=table.c.next_value + count)
+        )
+        if updated.rowcount:
+            end = connection.execute(db.select(table.c.next_value).where(table.c.name == COMMIT_SEQUENCE)).scalar_one()
+            return end - count
+        # 首次使用：从现有最大顺序号之后编号
+        try:
+            with connection.begin_nested():
+                start = (connection.execute(db.select(db.func.max(RiskAssessment.created_seq))).scalar() or 0) + 1
+                connection.execute(table.insert().values(name=COMMIT_SEQUENCE, next_value=start + count))
+            return start
+        except IntegrityError:
+            # 其他事务已完成初始化，重新走UPDATE分支
+            continue
+    raise RuntimeError("无法预留提交顺序号")
+
+@event.listens_for(RiskAssessment, 'before_insert')
+def _assign_commit_seq(mapper, connection, target):
+    # 通过ORM新增的评估记录（批量写入由 AssessmentWriter 在同一事务中整批预留）
+    if target.created_seq is None:
+        target.created_seq = reserve_commit_seq(connection)
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """为SQLite引擎注册连接事件，每个新建的连接执行一次 PRAGMA 设置"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    statements = ['PRAGMA %s = %s' % (name, value) for name, value in pragmas.items()]
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+def init_engines(app):
+    """按配置初始化所有数据库引擎的连接参数（需在 db.init_app 之后调用）"""
+    with app.app_context():
+        for key, engine in db.engines.items():
+            pragmas = app.config['SQLITE_PRAGMAS']
+            if key == 'replica':
+                # 从库连接只读，防止误写
+                pragmas = dict(pragmas, query_only='ON')
+            apply_sqlite_pragmas(engine, pragmas)
+
+# 已被替换的索引（旧版本按 (risk_level, physical_activity) 建立，统计查询用不到）
+OBSOLETE_INDEXES = ('ix_risk_assessment_level_activity',)
+
+def upgrade_schema():
+    """
+    对已有数据库执行增量结构升级（db.create_all只创建缺失的表）
+    - 为已有表添加模型中新增的列，放宽模型中已改为可空的列
+    - 创建模型中新增的索引，删除已被替换的索引
+    - 回填风险评估记录的结构化列和提交顺序号
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = inspector.get_table_names()
+    is_sqlite = db.engine.dialect.name == 'sqlite'
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column['name']: column for column in inspector.get_columns(table.name)}
+            # 模型中已改为可空、数据库中仍为NOT NULL的列（例如匿名评估的user_id）
+            relaxed = [column for column in table.columns
+                       if column.name in existing_columns and column.nullable
+                       and not column.primary_key and not existing_columns[column.name]['nullable']]
+            
+            if relaxed and is_sqlite:
+                # SQLite不支持修改列约束，按模型定义重建表并复制数据
+                _rebuild_sqlite_table(conn, table, existing_columns)
+                continue
+            for column in relaxed:
+                conn.execute(db.text(f'ALTER TABLE {table.name} ALTER COLUMN {column.name} DROP NOT NULL'))
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    conn.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    with db.engine.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+    
+    backfill_assessment_columns()
+    backfill_commit_seq()
+
+def _rebuild_sqlite_table(conn, table, existing_columns):
+    """按模型定义重建SQLite表，保留原有数据（索引由upgrade_schema随后创建）"""
+    temp_name = f'{table.name}__rebuild'
+    create_sql = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.execute(db.text(f'DROP TABLE IF EXISTS {temp_name}'))
+    conn.execute(db.text(create_sql.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {temp_name} ', 1)))
+    shared = ', '.join(column.name for column in table.columns if column.name in existing_columns)
+    conn.execute(db.text(f'INSERT INTO {temp_name} ({shared}) SELECT {shared} FROM {table.name}'))
+    conn.execute(db.text(f'DROP TABLE {table.name}'))
+    conn.execute(db.text(f'ALTER TABLE {temp_name} RENAME TO {table.name}'))
+
+def backfill_commit_seq(batch_size=1000):
+    """为没有提交顺序号的记录（升级前写入的记录）按ID顺序分配顺序号"""
+    table = RiskAssessment.__table__
+    updated = 0
+    while True:
+        with db.engine.begin() as conn:
+            ids = conn.execute(
+                db.select(table.c.id).where(table.c.created_seq.is_(None)).order_by(table.c.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return updated
+            start = reserve_commit_seq(conn, len(ids))
+            conn.execute(
+                table.update().where(table.c.id == db.bindparam('row_id')).values(created_seq=db.bindparam('seq')),
+                [{'row_id': row_id, 'seq': start + i} for i, row_id in enumerate(ids)]
+            )
+        updated += len(ids)
+
+def backfill_assessment_columns(batch_size=1000):
+    """
+    从旧记录的factors JSON中解析各因素得分和可还原的答案，写入结构化列
+    - 旧记录的factors列保留不变，to_dict仍返回原始内容
+    - 腰围描述不含性别信息，waist_status无法还原，保持为空
+    """
+    from utils.risk_calculator import AGE_SCORES, BMI_DESCRIPTIONS, ACTIVITY_DESCRIPTIONS
+    bmi_by_description = {description: value for value, description in BMI_DESCRIPTIONS.items()}
+    activity_by_description = {description: value for value, description in ACTIVITY_DESCRIPTIONS.items()}
+    
+    table = RiskAssessment.__table__
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.factors)
+            .where(table.c.id > last_id, table.c.age_score.is_(None), table.c.factors.isnot(None))
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        values = []
+        for row in rows:
+            data = json.loads(row.factors)
+            factors = data.get('risk_factors', data)
+            if not all(factor in factors for factor in FACTOR_SCORE_COLUMNS):
+                continue
+            
+            age = factors['age'].get('description', '').removesuffix('岁')
+            fields = {column: factors[factor]['score'] for factor, column in FACTOR_SCORE_COLUMNS.items()}
+            fields.update({
+                'age_range': age if age in AGE_SCORES else None,
+                'bmi_category': bmi_by_description.get(factors['bmi'].get('description')),
+                'family_history': fields['family_score'] > 0,
+                'physical_activity': activity_by_description.get(factors['activity'].get('description')),
+                'blood_pressure': fields['blood_pressure_score'] > 0,
+                'glucose_history': fields['glucose_score'] > 0,
+                'row_id': row.id
+            })
+            values.append(fields)
+        
+        if values:
+            columns = {key: db.bindparam(key) for key in values[0] if key != 'row_id'}
+            db.session.execute(table.update().where(table.c.id == db.bindparam('row_id')).values(**columns), values)
+            db.session.commit()
+            updated += len(values)
+        last_id = rows[-1].id
+    return updated
@@ -1,4 +1,12 @@
-from app import app
+import os
+from app import create_app
+from models import db, upgrade_schema
+
+# 开发服务器；生产环境使用 gunicorn -c gunicorn.conf.py wsgi:application
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1')
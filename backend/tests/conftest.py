@@ -0,0 +1,58 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# TestingConfig 在导入时读取 TEST_DATABASE_URL，需在导入应用之前指定临时数据库
+os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+from utils.assessment_writer import assessment_writer  # noqa: E402
+from utils.data_loader import dataset_cache  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app('testing')
+
+
+@pytest.fixture
+def database(app):
+    """每个测试使用新建的空表（在应用上下文中运行）"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # 进程内预留的ID段属于被删除的表
+        assessment_writer.ids.reset()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """数据集文件改为读写临时目录中的副本，导入发布不修改仓库中的数据文件"""
+    for name in dataset_cache.names():
+        path, builder, fallback, indexer = dataset_cache._sources[name]
+        copy = tmp_path / os.path.basename(path)
+        if os.path.exists(path):
+            shutil.copyfile(path, copy)
+        monkeypatch.setitem(dataset_cache._sources, name, (str(copy), builder, fallback, indexer))
+    dataset_cache.reload()
+    yield tmp_path
+    monkeypatch.undo()
+    dataset_cache.reload()
+
+
+@pytest.fixture
+def admin_client(app, database, monkeypatch):
+    """已登录的管理员客户端"""
+    monkeypatch.setitem(app.config, 'ADMIN_USERNAMES', frozenset({'admin'}))
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'admin', 'email': 'admin@example.com', 'password': 'secret'})
+    response = client.post('/api/login', json={'username': 'admin', 'password': 'secret'})
+    assert response.status_code == 200
+    return client
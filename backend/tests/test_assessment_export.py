@@ -0,0 +1,49 @@
+import json
+
+from models import RiskAssessment, backfill_commit_seq
+from utils.assessment_export import export_watermark, iter_export
+from utils.assessment_writer import IdAllocator, assessment_writer
+from test_assessment_writer import assessment_fields
+
+
+def exported_ids(since, until):
+    return [json.loads(line)['id'] for line in iter_export('ndjson', since, until)]
+
+
+def test_incremental_export_includes_rows_committed_late_with_smaller_ids(database, monkeypatch):
+    db = database
+    # 另一个进程先预留了较小的ID段，但较晚提交
+    other_process = IdAllocator('risk_assessment', RiskAssessment, block_size=10)
+    late = [other_process.allocate() for _ in range(2)]
+
+    monkeypatch.setattr(assessment_writer, 'enabled', True)
+    early = [assessment_writer.submit(**assessment_fields()) for _ in range(3)]
+    assessment_writer.flush()
+    assert min(early) > max(late)
+
+    first_watermark = export_watermark()
+    assert exported_ids(0, first_watermark) == early
+
+    for assessment_id in late:
+        db.session.add(RiskAssessment(id=assessment_id, **assessment_fields()))
+    db.session.commit()
+
+    second_watermark = export_watermark()
+    assert exported_ids(first_watermark, second_watermark) == late
+    assert exported_ids(second_watermark, export_watermark()) == []
+
+
+def test_backfill_numbers_existing_rows_after_assigned_ones(database):
+    db = database
+    db.session.add(RiskAssessment(**assessment_fields()))
+    db.session.commit()
+    # 升级前写入的记录没有提交顺序号
+    table = RiskAssessment.__table__
+    db.session.execute(table.insert(), [dict(id=100 + i, **assessment_fields()) for i in range(3)])
+    db.session.execute(table.update().where(table.c.id >= 100).values(created_seq=None))
+    db.session.commit()
+
+    assert backfill_commit_seq(batch_size=2) == 3
+    rows = db.session.execute(db.select(table.c.id, table.c.created_seq).order_by(table.c.created_seq)).all()
+    assert [row.id for row in rows][1:] == [100, 101, 102]
+    assert len({row.created_seq for row in rows}) == 4
@@ -0,0 +1,98 @@
+from models import RiskAssessment
+from utils.assessment_writer import IdAllocator, assessment_writer
+from utils.risk_table import lookup_risk_score
+
+ANSWERS = {
+    'age_range': '50-59', 'bmi_category': 'overweight', 'waist_status': 'abnormal-female',
+    'family_history': 'yes', 'physical_activity': 'irregular', 'blood_pressure': 'no', 'glucose_history': 'no'
+}
+
+
+def assessment_fields():
+    result = lookup_risk_score(ANSWERS)
+    return dict(risk_score=result['risk_score'], risk_level=result['risk_level'],
+                **RiskAssessment.structured_fields(ANSWERS, result['risk_factors']))
+
+
+def stored_ids(db):
+    return sorted(db.session.execute(db.select(RiskAssessment.id)).scalars())
+
+
+def test_sync_orm_and_queued_inserts_share_id_source(database, monkeypatch):
+    db = database
+    # 另一个进程的写入器已预留ID段，尚未写入
+    other_process = IdAllocator('risk_assessment', RiskAssessment, block_size=10)
+    reserved = [other_process.allocate() for _ in range(3)]
+
+    monkeypatch.setattr(assessment_writer, 'enabled', True)
+    queued = [assessment_writer.submit(**assessment_fields()) for _ in range(3)]
+
+    monkeypatch.setattr(assessment_writer, 'enabled', False)
+    synchronous = assessment_writer.submit(**assessment_fields())
+    orm = RiskAssessment(**assessment_fields())
+    db.session.add(orm)
+    db.session.commit()
+
+    assessment_writer.stop()
+    for assessment_id in reserved:
+        db.session.add(RiskAssessment(id=assessment_id, **assessment_fields()))
+    db.session.commit()
+
+    expected = reserved + queued + [synchronous, orm.id]
+    assert len(set(expected)) == len(expected)
+    assert stored_ids(db) == sorted(expected)
+    assert assessment_writer.stats()['failed_rows'] == 0
+
+
+def test_orm_flush_reserving_id_blocks(database, monkeypatch):
+    db = database
+    # 每个ID都需要新预留ID段，预留需在本次flush取得写锁之前完成
+    monkeypatch.setattr(assessment_writer, 'ids', IdAllocator('risk_assessment', RiskAssessment, block_size=1))
+    records = [RiskAssessment(**assessment_fields()) for _ in range(3)]
+    db.session.add_all(records)
+    db.session.commit()
+
+    assert stored_ids(db) == sorted(record.id for record in records)
+    assert len({record.created_seq for record in records}) == 3
+
+
+def test_flush_writes_queue_in_batches(database, monkeypatch):
+    db = database
+    monkeypatch.setattr(assessment_writer, 'enabled', True)
+    monkeypatch.setattr(assessment_writer, 'flush_size', 2)
+    # 不启动后台线程，由测试显式刷新
+    monkeypatch.setattr(assessment_writer, '_ensure_started', lambda: None)
+    before = assessment_writer.stats()
+
+    queued = [assessment_writer.submit(**assessment_fields()) for _ in range(5)]
+    assert stored_ids(db) == []
+    assessment_writer.flush()
+
+    stats = assessment_writer.stats()
+    assert stats['flushes'] - before['flushes'] == 3
+    assert stats['flushed_rows'] - before['flushed_rows'] == 5
+    assert stored_ids(db) == sorted(queued)
+
+
+def test_failed_batch_falls_back_to_row_inserts(database, monkeypatch):
+    db = database
+    monkeypatch.setattr(assessment_writer, 'enabled', True)
+    monkeypatch.setattr(assessment_writer, '_ensure_started', lambda: None)
+    monkeypatch.setattr('utils.assessment_writer.time.sleep', lambda seconds: None)
+    before = assessment_writer.stats()
+
+    queued = [assessment_writer.submit(**assessment_fields()) for _ in range(4)]
+    # 其中一个ID已被占用，多行INSERT整体失败，逐行插入只丢弃冲突的一行
+    db.session.add(RiskAssessment(id=queued[1], risk_score=0, risk_level='low'))
+    db.session.commit()
+    assessment_writer.flush()
+
+    stats = assessment_writer.stats()
+    assert stats['failed_rows'] - before['failed_rows'] == 1
+    assert stats['flushed_rows'] - before['flushed_rows'] == 3
+    assert stored_ids(db) == sorted(queued)
+    conflicting = db.session.get(RiskAssessment, queued[1])
+    assert conflicting.risk_level == 'low'
+    # 丢弃的行预留的提交顺序号随保存点回滚，其余行的顺序号连续
+    sequence = sorted(db.session.execute(db.select(RiskAssessment.created_seq)).scalars())
+    assert sequence == list(range(sequence[0], sequence[0] + 4))
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+
+from utils.data_loader import DatasetCache, parse_json
+
+
+def write(path, data):
+    raw = json.dumps(data).encode('utf-8')
+    path.write_bytes(raw)
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def make_cache(tmp_path):
+    cache = DatasetCache(check_interval=0)
+    # 绝对路径不会拼接到数据目录下
+    cache.register('sample', str(tmp_path / 'sample.json'), lambda data: data, lambda: {'fallback': True})
+    return cache
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / 'sample.json'
+    cache = make_cache(tmp_path)
+    assert cache.get('sample').version == 'fallback'
+
+    first = write(path, {'rows': [1, 2]})
+    assert cache.get('sample').version == first
+    assert cache.get('sample').data == {'rows': [1, 2]}
+
+    second = write(path, {'rows': [1, 2, 3]})
+    # 确保 mtime 变化可被检测到（部分文件系统的时间精度较低）
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    snapshot = cache.get('sample')
+    assert snapshot.version == second
+    assert snapshot.data == {'rows': [1, 2, 3]}
+    assert cache.stats()['reloads'] == 2
+
+
+def test_unparsable_file_keeps_previous_version(tmp_path):
+    path = tmp_path / 'sample.json'
+    cache = make_cache(tmp_path)
+    version = write(path, {'rows': [1]})
+    assert cache.get('sample').version == version
+
+    path.write_bytes(b'{"rows": [1,')
+    assert cache.get('sample').version == version
+    assert cache.stats()['errors'] == 1
+
+
+def test_parse_json_matches_standard_library():
+    raw = json.dumps({'name': '北京', 'rate': 10.5, 'count': 2 ** 70, 'items': [None, True]}).encode('utf-8')
+    assert parse_json(raw) == json.loads(raw)
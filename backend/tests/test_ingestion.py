@@ -0,0 +1,105 @@
+import io
+import os
+from fractions import Fraction
+
+import pytest
+
+from utils.data_loader import dataset_cache
+from utils.ingestion import IngestionError, ingest, iter_source_rows
+
+SOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sources')
+
+CHINA_CSV = '省份,区域,总患病率,人口,病例数\n北京,华北,10.5%,2000,210\n'
+
+
+def test_non_utf8_csv_is_rejected(data_dir):
+    rows = iter_source_rows(io.BytesIO(CHINA_CSV.encode('gbk')), 'csv')
+    with pytest.raises(IngestionError, match='UTF-8'):
+        ingest('china', rows, 'gbk.csv', dry_run=True)
+
+
+def test_non_utf8_csv_upload_returns_400(data_dir, admin_client):
+    response = admin_client.post('/api/data/china/ingest', data={
+        'file': (io.BytesIO(CHINA_CSV.encode('gbk')), 'provinces.csv'), 'dry_run': 'true'
+    })
+    assert response.status_code == 400
+    assert 'UTF-8' in response.get_json()['error']
+
+
+def test_corrupt_xlsx_is_rejected(data_dir, admin_client):
+    pytest.importorskip('openpyxl')
+    with pytest.raises(IngestionError, match='xlsx'):
+        list(iter_source_rows(io.BytesIO(b'PK\x03\x04 not really a workbook'), 'xlsx'))
+
+    response = admin_client.post('/api/data/china/ingest', data={
+        'file': (io.BytesIO(CHINA_CSV.encode('utf-8')), 'provinces.xlsx'), 'dry_run': 'true'
+    })
+    assert response.status_code == 400
+
+
+def csv_rows(text):
+    return iter_source_rows(io.StringIO(text), 'csv')
+
+
+def exact_sum(values):
+    total = sum(Fraction(value) for value in values)
+    return float(total) if any(isinstance(value, float) for value in values) else int(total)
+
+
+def recomputed_summary(provinces):
+    """由记录从头计算全国汇总，作为增量维护结果的对照"""
+    rates = [province['total_rate'] for province in provinces]
+    return {
+        'total_population': exact_sum([province['population'] for province in provinces]),
+        'total_cases': exact_sum([province['cases'] for province in provinces]),
+        'avg_diabetes_rate': round(float(exact_sum(rates)) / len(rates), 2) if rates else 0
+    }
+
+
+def assert_aggregates_match_recompute(report):
+    data, version = dataset_cache.read_raw('china')
+    assert version == report['version']
+    assert data['summary'] == report['summary'] == recomputed_summary(data['provinces'])
+    by_name = {province['name']: province for province in data['provinces']}
+    for region, members in data['regions'].items():
+        expected = recomputed_summary([by_name[name] for name in members if name in by_name])
+        assert report['regions'][region] == {'total_population': expected['total_population'],
+                                             'total_cases': expected['total_cases'],
+                                             'avg_rate': expected['avg_diabetes_rate']}
+    return data
+
+
+def test_replace_then_merge_keeps_aggregates_equal_to_full_recompute(data_dir):
+    with open(os.path.join(SOURCES, 'provinces.csv'), 'rb') as f:
+        report = ingest('china', iter_source_rows(f, 'csv'), 'provinces.csv', mode='replace')
+    assert report['published'] and report['failed'] == 0
+    data = assert_aggregates_match_recompute(report)
+    provinces = len(data['provinces'])
+    original = next(p for p in data['provinces'] if p['name'] == '吉林')
+
+    # 合并：更新已有省份的部分列（其余列保留原值），并新增一个省份到指定区域
+    report = ingest('china', csv_rows(
+        'name,total_rate,population,cases,region\n'
+        '吉林,9.75,2400,234.5,northeast\n'
+        '测试省,7.5,1000,75,north\n'
+    ), 'update.csv', mode='merge')
+    assert (report['inserted'], report['updated'], report['published']) == (1, 1, True)
+    data = assert_aggregates_match_recompute(report)
+    assert len(data['provinces']) == provinces + 1
+    updated = next(p for p in data['provinces'] if p['name'] == '吉林')
+    assert (updated['total_rate'], updated['cases'], updated['summary']) == (9.75, 234.5, original['summary'])
+    assert '测试省' in data['regions']['north']
+
+    # 替换：只保留本次导入的记录
+    report = ingest('china', csv_rows('name,total_rate,population,cases\n吉林,9.75,2400,234.5\n'),
+                    'single.csv', mode='replace')
+    data = assert_aggregates_match_recompute(report)
+    assert [p['name'] for p in data['provinces']] == ['吉林']
+
+
+def test_rows_with_errors_are_not_published(data_dir):
+    before = dataset_cache.read_raw('china')[1]
+    report = ingest('china', csv_rows('name,total_rate,population,cases\n吉林,abc,2400,234\n'), 'bad.csv')
+    assert report['failed'] == 1 and not report['published']
+    assert report['errors'][0]['row'] == 2
+    assert dataset_cache.read_raw('china')[1] == before
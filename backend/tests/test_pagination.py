@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import RiskAssessment, User
+from test_assessment_writer import assessment_fields
+from utils.pagination import InvalidQueryParameter, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assessment_date = datetime(2025, 3, 1, 8, 30, 15, 123456)
+    cursor = encode_cursor(assessment_date, 42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (assessment_date, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-a-cursor', encode_cursor(datetime(2025, 1, 1), 1)[:-3]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidQueryParameter):
+        decode_cursor(cursor)
+
+
+def test_history_pages_cover_every_record_once(database, admin_client):
+    db = database
+    user = db.session.execute(db.select(User).filter_by(username='admin')).scalar_one()
+    base = datetime(2025, 1, 1)
+    # 每个时间点有多条记录，游标需要用ID区分同一时间的记录
+    for i in range(7):
+        db.session.add(RiskAssessment(user_id=user.id, assessment_date=base + timedelta(days=i // 3),
+                                      **assessment_fields()))
+    db.session.commit()
+    expected = [row.id for row in db.session.execute(
+        db.select(RiskAssessment.id).order_by(RiskAssessment.assessment_date.desc(), RiskAssessment.id.desc())
+    )]
+
+    seen, cursor = [], None
+    while True:
+        response = admin_client.get('/api/risk/history', query_string={'limit': 3, 'fields': 'id', 'cursor': cursor})
+        assert response.status_code == 200
+        body = response.get_json()
+        seen += [item['id'] for item in body['items']]
+        cursor = body.get('next_cursor')
+        if not cursor:
+            break
+    assert seen == expected
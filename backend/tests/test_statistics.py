@@ -0,0 +1,29 @@
+from sqlalchemy import func, text
+
+from models import FACTOR_SCORE_COLUMNS, RiskAssessment
+from test_assessment_writer import assessment_fields
+
+
+def test_activity_grouping_uses_covering_index(database):
+    plan = database.session.execute(text(
+        'EXPLAIN QUERY PLAN SELECT risk_level, activity_score, count(*) FROM risk_assessment '
+        'GROUP BY risk_level, activity_score'
+    )).all()
+    details = ' '.join(row[-1] for row in plan)
+    assert 'COVERING INDEX ix_risk_assessment_level_activity_score' in details
+    assert 'TEMP B-TREE' not in details
+
+
+def test_factor_counts_match_per_factor_queries(database, admin_client):
+    db = database
+    for activity_score, family_score in ((0, 0), (2, 3), (4, 0)):
+        fields = assessment_fields()
+        fields.update(activity_score=activity_score, family_score=family_score)
+        db.session.add(RiskAssessment(**fields))
+    db.session.commit()
+
+    present = admin_client.get('/api/risk/statistics').get_json()['factor_present_by_level']
+    for factor, column in FACTOR_SCORE_COLUMNS.items():
+        rows = db.session.query(RiskAssessment.risk_level, func.count())\
+            .filter(getattr(RiskAssessment, column) > 0).group_by(RiskAssessment.risk_level).all()
+        assert present[factor] == dict(rows)
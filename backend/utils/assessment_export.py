@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from sqlalchemy import func, select
+from models import db, RiskAssessment
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# CSV中展开的风险因素得分列
+FACTOR_COLUMNS = ('age', 'bmi', 'waist', 'family', 'activity', 'blood_pressure', 'glucose')
+CSV_COLUMNS = ['id', 'user_id', 'risk_score', 'risk_level', 'assessment_date'] + \
+    [f'{name}_score' for name in FACTOR_COLUMNS] + ['factors']
+
+
+def export_watermark():
+    """
+    导出开始时已提交记录的最大提交顺序号，导出范围截止到该值，下次增量导出以此作为since
+    - 不使用最大ID：多个进程异步写入时各进程的ID段交错提交，较晚提交的较小ID会被漏掉
+    - 提交顺序号在写入事务中取号并持锁到提交，尚未提交的记录提交后的顺序号一定大于此值
+    """
+    return db.session.execute(select(func.max(RiskAssessment.created_seq))).scalar() or 0
+
+
+def iter_assessments(since=0, until=None, batch_size=1000):
+    """
+    按提交顺序逐批读取评估记录（created_seq > since），输出 RiskAssessment.to_dict() 格式
+    通过yield_per流式读取表行，不经过会话的identity map，内存占用与总行数无关
+    """
+    table = RiskAssessment.__table__
+    query = select(table).where(table.c.created_seq > since).order_by(table.c.created_seq)
+    if until is not None:
+        query = query.where(table.c.created_seq <= until)
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for row in result.mappings():
+        # 临时对象不加入会话，仅用于复用to_dict的输出格式
+        yield RiskAssessment(**row).to_dict()
+
+
+def _risk_factors(record):
+    # 处理不同版本的数据格式
+    factors = record['factors']
+    return factors.get('risk_factors', factors)
+
+
+def iter_ndjson(records):
+    """每条记录输出一行JSON"""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def iter_csv(records, rows_per_chunk=500):
+    """输出带表头的CSV，风险因素得分展开为独立列，完整因素保留在factors列"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for record in records:
+        factors = _risk_factors(record)
+        writer.writerow(
+            [record['id'], record['user_id'], record['risk_score'], record['risk_level'], record['assessment_date']] +
+            [factors.get(name, {}).get('score') for name in FACTOR_COLUMNS] +
+            [json.dumps(factors, ensure_ascii=False)]
+        )
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_export(export_format, since=0, until=None, batch_size=1000):
+    """按格式生成导出内容的文本块"""
+    records = iter_assessments(since, until, batch_size)
+    if export_format == 'csv':
+        return iter_csv(records)
+    return iter_ndjson(records)
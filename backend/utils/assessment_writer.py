@@ -0,0 +1,274 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from flask_sqlalchemy.session import Session
+from models import db, RiskAssessment, IdSequence, reserve_commit_seq
+from utils.counters import Counters
+
+logger = logging.getLogger(__name__)
+
+
+class WriterBusyError(Exception):
+    """写入队列已满，调用方应返回503让客户端稍后重试"""
+
+
+class IdAllocator:
+    """
+    按块预分配主键
+    - 每次从 id_sequence 表预留 block_size 个ID，之后在进程内分配，不再访问数据库
+    - 预留通过单条UPDATE完成，多进程并发时也不会拿到重复的ID段
+    - 表的所有写入都必须从这里取ID：数据库自增同样从最大ID之后编号，会与其他进程已预留、尚未写入的ID冲突
+    """
+
+    def __init__(self, name, model, block_size=1000):
+        self.name = name
+        self.model = model
+        self.block_size = block_size
+        self._next = 0
+        self._limit = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """丢弃当前预留的ID段（fork后子进程不能继续使用父进程的ID段）"""
+        self._next = self._limit = 0
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = self._reserve_block()
+                self._limit = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    def _reserve_block(self):
+        table = IdSequence.__table__
+        for _ in range(3):
+            with db.engine.begin() as conn:
+                updated = conn.execute(
+                    table.update()
+                    .where(table.c.name == self.name)
+                    .values(next_value=table.c.next_value + self.block_size)
+                )
+                if updated.rowcount:
+                    end = conn.execute(select(table.c.next_value).where(table.c.name == self.name)).scalar_one()
+                    return end - self.block_size
+            # 首次使用：从现有最大ID之后开始编号
+            try:
+                with db.engine.begin() as conn:
+                    start = (conn.execute(select(func.max(self.model.id))).scalar() or 0) + 1
+                    conn.execute(insert(table).values(name=self.name, next_value=start + self.block_size))
+                    return start
+            except IntegrityError:
+                # 其他进程已完成初始化，重新走UPDATE分支
+                continue
+        raise RuntimeError("无法预留ID段: %s" % self.name)
+
+
+class AssessmentWriter:
+    """
+    风险评估结果的异步批量写入（write-behind）
+    - submit() 立即分配评估ID并放入有界队列，不等待数据库提交
+    - 后台线程在累计 flush_size 条或等待 flush_interval 秒后，用一条多行INSERT批量写入
+    - 队列满时最多阻塞 enqueue_timeout 秒，仍无空位则抛出 WriterBusyError（背压）
+    - 进程退出时刷新队列中剩余的记录
+    - 同步写入（ASSESSMENT_WRITE_BEHIND=false）和其他代码通过ORM新增的评估记录同样从 self.ids 取ID，
+      与其他进程中异步写入的记录不会冲突
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._hooks_registered = False
+        self._stats = Counters(
+            enqueued=0, rejected=0, flushes=0, flushed_rows=0, failed_rows=0,
+            last_flush_ms=0.0, max_flush_ms=0.0, total_flush_ms=0.0
+        )
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['ASSESSMENT_WRITE_BEHIND']
+        self.queue_size = app.config['ASSESSMENT_QUEUE_SIZE']
+        self.flush_size = app.config['ASSESSMENT_FLUSH_SIZE']
+        self.flush_interval = app.config['ASSESSMENT_FLUSH_INTERVAL']
+        self.enqueue_timeout = app.config['ASSESSMENT_ENQUEUE_TIMEOUT']
+        self.ids = IdAllocator('risk_assessment', RiskAssessment, app.config['ASSESSMENT_ID_BLOCK'])
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        if not self._hooks_registered:
+            self._hooks_registered = True
+            # 在flush执行任何SQL之前分配ID：预留ID段使用独立连接，若在flush取得写锁（如预留提交顺序号）之后
+            # 才预留，SQLite上会等待本会话自身持有的锁
+            event.listen(Session, 'before_flush', self._assign_ids)
+            atexit.register(self.stop)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # 子进程不继承后台线程，也不能复用父进程预留的ID段和队列内容
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self.ids.reset()
+
+    def _assign_ids(self, session, flush_context, instances):
+        # 未指定ID的ORM新增不使用数据库自增
+        for target in session.new:
+            if isinstance(target, RiskAssessment) and target.id is None:
+                target.id = self.ids.allocate()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='assessment-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, **fields):
+        """写入一条评估记录（fields为RiskAssessment的列值），返回评估ID"""
+        row = dict(fields)
+        row.setdefault('user_id', None)
+        row.setdefault('assessment_date', datetime.utcnow())
+        # 在加入会话前分配，预留ID段时不会与本会话未提交的写入争用数据库锁
+        row['id'] = self.ids.allocate()
+
+        if not self.enabled:
+            db.session.add(RiskAssessment(**row))
+            db.session.commit()
+            return row['id']
+
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._stats.incr('rejected')
+            raise WriterBusyError("评估结果写入队列已满")
+        self._stats.incr('enqueued')
+        return row['id']
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                failed = self._insert(batch)
+            finally:
+                db.session.remove()
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self._stats.add(flushes=1, flushed_rows=len(batch) - len(failed), failed_rows=len(failed),
+                        total_flush_ms=elapsed)
+        self._stats.set('last_flush_ms', round(elapsed, 3))
+        self._stats.maximum('max_flush_ms', round(elapsed, 3))
+
+    def _insert(self, batch):
+        """
+        写入一批记录，返回写入失败的记录
+        多行INSERT重试仍失败时（可能只是其中一行有问题，如ID冲突）回退为逐行插入（每行一个保存点），
+        只丢弃本身写入失败的行，其余行照常写入
+        提交顺序号在同一事务中预留，保证增量导出按提交先后读取（见 reserve_commit_seq）
+        """
+        for attempt in range(3):
+            try:
+                start = reserve_commit_seq(db.session.connection(), len(batch))
+                for offset, row in enumerate(batch):
+                    row['created_seq'] = start + offset
+                db.session.execute(insert(RiskAssessment), batch)
+                db.session.commit()
+                return []
+            except Exception as e:
+                db.session.rollback()
+                logger.warning("评估结果批量写入失败（第%d次）: %s", attempt + 1, e)
+                time.sleep(0.1 * (attempt + 1))
+
+        failed = []
+        for row in batch:
+            try:
+                with db.session.begin_nested():
+                    row['created_seq'] = reserve_commit_seq(db.session.connection())
+                    db.session.execute(insert(RiskAssessment), [row])
+            except Exception as e:
+                failed.append(row)
+                logger.error("丢弃评估结果 ID=%s: %s", row['id'], e)
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("丢弃%d条评估结果，ID: %s: %s", len(batch), [row['id'] for row in batch], e)
+            return batch
+        return failed
+
+    def flush(self):
+        """同步刷新队列中所有记录（用于停机和测试）"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.flush_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def stop(self, timeout=5.0):
+        """停止后台线程并写入剩余记录"""
+        if self._queue is None:
+            return
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+        self._thread = None
+
+    def stats(self):
+        stats = self._stats.snapshot()
+        flushes = stats['flushes']
+        return dict(
+            stats,
+            enabled=self.enabled,
+            queue_depth=self._queue.qsize() if self._queue is not None else 0,
+            avg_flush_ms=round(stats['total_flush_ms'] / flushes, 3) if flushes else 0.0
+        )
+
+
+assessment_writer = AssessmentWriter()
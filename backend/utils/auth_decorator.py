@@ -1,73 +1,97 @@
 from functools import wraps
 from flask import request, jsonify, current_app, g
 from flask_login import current_user
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt, get_current_user
+from flask_jwt_extended.exceptions import WrongTokenError
 import logging
-from functools import wraps
+from utils.log_config import debug_trace
+from utils.token_cache import TokenIdentity, token_cache
 
-# 配置日志记录
-def setup_logger():
-    logger = logging.getLogger('auth_decorator')
-    if not logger.handlers:
-        logger.setLevel(logging.DEBUG)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    return logger
+logger = logging.getLogger(__name__)
 
-def dual_auth_required(fn):
+def claims_identity(token):
+    """
+    仅凭令牌声明构造用户身份（无状态快速路径）
+    - 验证结果按令牌摘要缓存，直到令牌过期
+    - 令牌缺少 username 声明（旧版本签发）时返回None，由调用方回退到数据库加载
+    """
+    claims = token_cache.verify(token)
+    if claims.get('type') != 'access':
+        raise WrongTokenError("Only non-refresh tokens are allowed")
+    if 'username' not in claims:
+        return None
+    return TokenIdentity(int(claims['sub']), claims['username'], claims.get('pv'))
+
+def dual_auth_required(fn=None, *, claims_only=False):
     """
     自定义认证装饰器，同时支持Flask-Login和JWT认证
     - 首先尝试使用JWT令牌认证，如果请求头中包含Authorization: Bearer token
     - 否则尝试使用Flask-Login的session认证
     - JWT验证错误会由app.py中的错误处理器捕获并返回详细信息
+    - JWT认证成功后，current_user 指向令牌对应的用户（经identity_cache加载，同一请求内只加载一次）
+    - 调试日志按路由抽样输出（见 utils/log_config.py），未抽中的请求不做任何格式化
+    
+    只需要用户ID/用户名的路由可以使用 @dual_auth_required(claims_only=True)：
+    JWT请求的 current_user 为 TokenIdentity，直接取自已验证的令牌声明，不查询数据库
     """
+    if fn is None:
+        return lambda f: dual_auth_required(f, claims_only=claims_only)
+    
     @wraps(fn)
     def decorated_function(*args, **kwargs):
-        logger = setup_logger()
-        
-        # 记录请求头和路径用于调试
+        trace = debug_trace(logger)
         auth_header = request.headers.get('Authorization')
-        logger.debug(f"请求路径: {request.path}")
-        logger.debug(f"Authorization头存在: {auth_header is not None}")
+        if trace:
+            logger.debug("请求路径: %s，Authorization头存在: %s", request.path, auth_header is not None)
         
         # 1. 如果有JWT令牌，使用JWT认证
         if auth_header and auth_header.startswith('Bearer '):
-            logger.debug("检测到Bearer令牌，尝试JWT认证")
+            if claims_only:
+                try:
+                    identity = claims_identity(auth_header[7:].strip())
+                except Exception as e:
+                    logger.info("JWT认证失败: %s: %s", type(e).__name__, e)
+                    raise
+                if identity is not None:
+                    if trace:
+                        logger.debug("JWT声明认证成功，用户ID: %s", identity.id)
+                    g._login_user = identity
+                    return fn(*args, **kwargs)
+            
             try:
                 # 验证JWT令牌
                 verify_jwt_in_request()
-                # 获取JWT中的用户身份
-                jwt_identity = get_jwt_identity()
-                jwt_data = get_jwt()
-                
-                logger.debug(f"JWT认证成功，用户ID: {jwt_identity}")
-                logger.debug(f"JWT数据: {jwt_data}")
-                
-                if jwt_identity:
-                    # JWT认证成功，继续处理请求
-                    return fn(*args, **kwargs)
-                else:
-                    logger.error("JWT令牌中未包含有效的用户身份")
-                    return jsonify({"error": "认证失败", "message": "JWT令牌中未包含有效的用户身份"}), 401
             except Exception as e:
-                # 记录异常信息以进行调试
-                logger.error(f"JWT认证失败: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
+                # 令牌无效属于客户端错误，只记录异常类型和原因，不输出堆栈
+                logger.info("JWT认证失败: %s: %s", type(e).__name__, e)
                 # 重新抛出异常，让JWT错误处理器处理
                 raise
+            
+            # 获取JWT中的用户身份
+            jwt_identity = get_jwt_identity()
+            if trace:
+                # 只记录声明名称，不输出令牌内容
+                logger.debug("JWT认证成功，用户ID: %s，声明: %s", jwt_identity, sorted(get_jwt()))
+            
+            if jwt_identity:
+                # JWT认证成功，让Flask-Login的current_user直接使用已加载的用户
+                user = get_current_user()
+                if user is not None:
+                    g._login_user = user
+                return fn(*args, **kwargs)
+            logger.warning("JWT令牌中未包含有效的用户身份")
+            return jsonify({"error": "认证失败", "message": "JWT令牌中未包含有效的用户身份"}), 401
         
         # 2. 如果没有JWT令牌，尝试使用Flask-Login的session认证
-        logger.debug(f"Flask-Login认证状态: {current_user.is_authenticated}")
         if current_user.is_authenticated:
-            logger.debug(f"Flask-Login认证成功，用户: {current_user.username}")
+            if trace:
+                logger.debug("Flask-Login认证成功，用户: %s", current_user.username)
             # Flask-Login认证成功，继续处理请求
             return fn(*args, **kwargs)
         
         # 3. 两种认证都失败，返回401错误
-        logger.error("所有认证方式失败")
+        if trace:
+            logger.debug("所有认证方式失败")
         return jsonify({"error": "认证失败，需要登录", "message": "请提供有效的认证信息"}), 401
     
     return decorated_function
@@ -83,4 +107,17 @@ def simple_auth_required(fn):
             return jsonify({"error": "认证失败", "message": "需要有效的JWT令牌"}), 401
         return fn(*args, **kwargs)
     
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+def admin_required(fn):
+    """
+    管理员权限装饰器，需放在dual_auth_required之后
+    管理员用户名通过配置项 ADMIN_USERNAMES 指定，未配置时所有请求均被拒绝
+    """
+    @wraps(fn)
+    def decorated_function(*args, **kwargs):
+        if current_user.username not in current_app.config['ADMIN_USERNAMES']:
+            return jsonify({"error": "权限不足", "message": "该操作需要管理员权限"}), 403
+        return fn(*args, **kwargs)
+    
+    return decorated_function
@@ -0,0 +1,92 @@
+import gzip
+from flask import request
+from utils.counters import Counters
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时只提供gzip
+    brotli = None
+
+
+class ResponseCompressor:
+    """
+    动态响应压缩（after_request）
+    - 按 Accept-Encoding 协商 br/gzip，只压缩配置的文本类型且不小于 min_size 字节的响应
+    - 跳过已有 Content-Encoding、已做过编码协商（Vary 中已含 Accept-Encoding，如预渲染接口和静态资源）、
+      流式输出、非200响应以及 Cache-Control: no-transform 的响应
+    - 压缩结果不比原文小时保留原文；原响应有ETag时追加编码后缀，与预渲染响应的约定一致
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        self.mimetypes = frozenset()
+        self._stats = Counters(compressed=0, uncompressed=0, bytes_in=0, bytes_out=0)
+
+    def init_app(self, app):
+        self.enabled = app.config['COMPRESSION_ENABLED']
+        self.min_size = app.config['COMPRESSION_MIN_SIZE']
+        self.gzip_level = app.config['COMPRESSION_GZIP_LEVEL']
+        self.brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+        self.mimetypes = frozenset(app.config['COMPRESSION_MIMETYPES'])
+        app.after_request(self.after_request)
+
+    def compressible(self, response):
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+            return False
+        if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+            return False
+        if 'Accept-Encoding' in response.vary or response.cache_control.no_transform:
+            return False
+        if response.mimetype not in self.mimetypes:
+            return False
+        length = response.content_length
+        if length is None:
+            length = len(response.get_data())
+        return length >= self.min_size
+
+    def after_request(self, response):
+        if not self.enabled or not self.compressible(response):
+            return response
+
+        # 可压缩的响应随客户端是否支持压缩而不同，缓存需按Accept-Encoding区分
+        response.vary.add('Accept-Encoding')
+        accepted = request.accept_encodings
+        if brotli is not None and accepted.quality('br') > 0:
+            encoding = 'br'
+        elif accepted.quality('gzip') > 0:
+            encoding = 'gzip'
+        else:
+            self._stats.incr('uncompressed')
+            return response
+
+        body = response.get_data()
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if len(compressed) >= len(body):
+            self._stats.incr('uncompressed')
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(etag + '-' + encoding, weak)
+        self._stats.add(compressed=1, bytes_in=len(body), bytes_out=len(compressed))
+        return response
+
+    def stats(self):
+        stats = self._stats.snapshot()
+        return dict(
+            stats,
+            enabled=self.enabled,
+            brotli=brotli is not None,
+            ratio=round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+        )
+
+
+response_compressor = ResponseCompressor()
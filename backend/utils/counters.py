@@ -0,0 +1,38 @@
+import threading
+
+
+class Counters:
+    """
+    线程安全的运行统计（供 /api/metrics 输出）
+    - 多个请求线程同时执行 dict[key] += n 时，读-改-写之间可能切换线程而丢失计数，这里的更新都在锁内完成
+    - 锁只保护几个数值，持有时间极短；不与组件自身的锁共用（如数据集重新加载时长时间持有的锁）
+    """
+
+    def __init__(self, **initial):
+        self._values = dict(initial)
+        self._lock = threading.Lock()
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._values[key] += amount
+
+    def add(self, **amounts):
+        """同时累加多个计数，读取方不会看到只更新了一部分的结果"""
+        with self._lock:
+            for key, amount in amounts.items():
+                self._values[key] += amount
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+    def maximum(self, key, value):
+        """记录最大值"""
+        with self._lock:
+            if value > self._values[key]:
+                self._values[key] = value
+
+    def snapshot(self):
+        """当前各计数的副本"""
+        with self._lock:
+            return dict(self._values)
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from utils.pagination import InvalidQueryParameter
+from utils.response_cache import MaterializedResponse, cache_key, materialize, render_materialized, response_cache
+
+# 面板名 -> 预渲染接口（endpoint），面板数据与对应的单独接口完全相同
+DASHBOARD_PANELS = {
+    'continents': 'get_continents_data',
+    'countries': 'get_countries_data',
+    'age-distribution': 'get_age_distribution',
+    'gender-ratio': 'get_gender_ratio',
+    'blood-sugar-trend': 'get_blood_sugar_trend',
+    'geo-distribution': 'get_geo_distribution',
+    'provinces': 'get_provinces_data',
+    'national-summary': 'get_national_summary',
+    'health-tips': 'get_health_tips'
+}
+
+# 依赖客户端 known 参数的组装结果只在小容量LRU中短暂缓存，避免不同参数组合无限占用内存
+PARTIAL_CACHE_SIZE = 64
+# 部分面板未变化的响应复用率低，使用较快的brotli压缩级别
+PARTIAL_BROTLI_QUALITY = 4
+
+
+def parse_panels(value):
+    """
+    解析 panels 参数（逗号分隔）并去重；为空时返回全部面板
+    结果按 DASHBOARD_PANELS 中的顺序排列，与参数中的顺序无关，同一组面板只对应一个缓存条目
+    """
+    if not value:
+        return tuple(DASHBOARD_PANELS)
+    panels = set()
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in DASHBOARD_PANELS:
+            raise InvalidQueryParameter("未知的面板: %s" % name)
+        panels.add(name)
+    return tuple(name for name in DASHBOARD_PANELS if name in panels)
+
+
+def parse_known_versions(value):
+    """解析 known 参数（面板:版本,...），即客户端已持有的面板版本"""
+    known = {}
+    for item in (value or '').split(','):
+        name, sep, version = item.strip().partition(':')
+        if sep and name and version:
+            known[name] = version
+    return known
+
+
+class _PartialCache:
+    """有容量上限的LRU缓存：(面板, 未变化的面板) -> (面板版本, MaterializedResponse)"""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def store(self, key, version, materialized):
+        with self._lock:
+            self._entries[key] = (version, materialized)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+_partial_cache = _PartialCache(PARTIAL_CACHE_SIZE)
+
+
+def build_dashboard(panels, known=None):
+    """
+    组装聚合响应
+    - 各面板直接复用单独接口的预渲染响应体拼接，不重新序列化
+    - 每个面板带有版本号（即单独接口的ETag）；客户端在 known 中提供的版本与当前一致时，
+      该面板只返回 {"unchanged": true, "version": ...}，用于局部刷新
+    - 完整响应（没有未变化的面板）按面板组合缓存在 response_cache 中，面板按固定顺序排列，组合数有限；
+      含未变化面板的响应取决于客户端参数，只放入容量有限的LRU缓存，并使用较快的压缩级别
+    - 任一面板版本变化后重新组装
+    返回 MaterializedResponse
+    """
+    known = known or {}
+    rendered = [(name, render_materialized(DASHBOARD_PANELS[name])) for name in panels]
+    for name, panel in rendered:
+        if not isinstance(panel, MaterializedResponse):
+            raise RuntimeError("面板 %s 渲染失败" % name)
+
+    unchanged = tuple(name for name, panel in rendered if known.get(name) == panel.etag)
+    version = tuple(panel.etag for _, panel in rendered)
+    if unchanged:
+        cache, key = _partial_cache, (panels, unchanged)
+    else:
+        cache, key = response_cache, cache_key('dashboard', {'panels': panels})
+    cached = cache.lookup(key, version)
+    if cached is not None:
+        return cached
+
+    entries = []
+    for name, panel in rendered:
+        etag = panel.etag.encode('ascii')
+        if name in unchanged:
+            entry = b'{"unchanged":true,"version":"' + etag + b'"}'
+        else:
+            # 单独接口的响应体以换行结尾，拼接时去掉
+            entry = b'{"data":' + panel.body.rstrip(b'\n') + b',"version":"' + etag + b'"}'
+        entries.append(b'"' + name.encode('ascii') + b'":' + entry)
+    body = b'{"panels":{' + b','.join(entries) + b'}}'
+    cached = materialize(body, brotli_quality=PARTIAL_BROTLI_QUALITY) if unchanged else materialize(body)
+    cache.store(key, version, cached)
+    return cached
@@ -1,93 +1,320 @@
-import json
-import os
-
-def load_china_data():
-    """加载中国省份糖尿病数据"""
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'china_data.json')
-    try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # 为前端提供简化格式
-            simplified_provinces = []
-            for province in data['provinces']:
-                simplified_provinces.append({
-                    'name': province['name'],
-                    'diabetes_rate': province['total_rate'],
-                    'population': province['population'],
-                    'cases': province['cases'],
-                    'male_rate': province['male_rate'],
-                    'female_rate': province['female_rate']
-                })
-            
-            return {
-                'provinces': simplified_provinces,
-                'metadata': data['metadata'],
-                'summary': data['summary'],
-                'regions': data['regions']
-            }
-            
-    except FileNotFoundError:
-        # 返回示例数据
-        return {
-            "provinces": [
-                {"name": "北京", "diabetes_rate": 8.5, "population": 2154, "cases": 183},
-                {"name": "上海", "diabetes_rate": 9.2, "population": 2428, "cases": 223},
-            ],
-            "metadata": {
-                "data_source": "fallback",
-                "last_updated": "2025-07-15"
-            }
-        }
-
-def load_international_data():
-    """加载国际糖尿病数据"""
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'international_data.json')
-    try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # 为前端提供简化格式
-            simplified_continents = []
-            for continent in data['continents']:
-                simplified_continents.append({
-                    'name': continent['name'],
-                    'diabetes_rate': continent['diabetes_rate'],
-                    'population': continent['population'],
-                    'cases': continent['cases'],
-                    'countries': continent['countries']
-                })
-            
-            return {
-                'continents': simplified_continents,
-                'metadata': data['metadata'],
-                'summary': data['summary'],
-                'global_trends': data['global_trends'],
-                'risk_levels': data['risk_levels']
-            }
-            
-    except FileNotFoundError:
-        # 返回示例数据
-        return {
-            "continents": [
-                {"name": "亚洲", "diabetes_rate": 60.0, "countries": 48},
-                {"name": "欧洲", "diabetes_rate": 6.2, "countries": 44},
-            ],
-            "metadata": {
-                "data_source": "fallback",
-                "last_updated": "2025-07-15"
-            }
-        }
-
-def load_trends_data():
-    """加载趋势数据"""
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'trends_data.json')
-    try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {
-            "years": [2010, 2015, 2020, 2025],
-            "global_rates": [6.4, 7.2, 8.5, 9.2],
-            "china_rates": [7.8, 8.6, 9.8, 10.6]
-        }
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+from utils.counters import Counters
+from utils.json_provider import orjson
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# 数据集快照：data 为解析后的只读数据，index 为加载时预先构建的查找索引（可为None），调用方均不得修改
+# signature 为加载时JSON文件的 (mtime_ns, size)，文件不存在时为None
+DatasetSnapshot = namedtuple('DatasetSnapshot', ['name', 'data', 'version', 'signature', 'loaded_at', 'index'])
+
+# 中国数据集的索引：省份名 -> 省份，区域名 -> 省份列表（保持数据文件中的顺序），区域汇总和全国汇总
+ChinaIndex = namedtuple('ChinaIndex', ['provinces', 'regions', 'region_summaries', 'national_summary'])
+
+
+def parse_json(raw):
+    """解析JSON字节：安装了orjson时使用orjson（比标准库快数倍），orjson无法处理的内容（如超出64位的整数）回退到标准库"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+class DatasetCache:
+    """
+    进程级数据集缓存
+    - 每个JSON文件只解析一次（安装了orjson时使用orjson解析），之后直接返回内存中的快照
+    - 按 check_interval 节流检查文件的 mtime/size，文件变化时重新解析
+    - 新快照整体替换旧快照（引用赋值是原子的），读取方不会看到半成品
+    - 解析失败时保留旧快照，避免写入中途的文件导致接口报错
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._sources = {}
+        self._snapshots = {}
+        self._next_check = {}
+        self._lock = threading.Lock()
+        self._stats = Counters(hits=0, misses=0, reloads=0, errors=0)
+
+    def register(self, name, filename, builder, fallback, indexer=None):
+        """
+        注册数据集：builder 将原始JSON转换为接口使用的结构，fallback 在文件缺失时返回示例数据
+        indexer（可选）在每次加载后基于转换后的数据构建索引，与数据一起原子替换
+        """
+        self._sources[name] = (os.path.join(DATA_DIR, filename), builder, fallback, indexer)
+
+    def names(self):
+        """已注册的数据集名称"""
+        return list(self._sources)
+
+    def path(self, name):
+        """数据集的JSON文件路径"""
+        return self._sources[name][0]
+
+    def _signature(self, name):
+        try:
+            stat = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def peek(self, name):
+        """
+        返回检查间隔内无需检查文件的快照，否则返回None
+        不访问文件、不等待重新加载，可在事件循环中调用；返回None时需在线程中调用get
+        """
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None and time.monotonic() < self._next_check.get(name, 0):
+            self._stats.incr('hits')
+            return snapshot
+        return None
+
+    def get(self, name):
+        """获取数据集的当前快照"""
+        snapshot = self.peek(name)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = self._snapshots.get(name)
+        signature = self._signature(name)
+        if snapshot is not None and snapshot.signature == signature:
+            self._next_check[name] = time.monotonic() + self.check_interval
+            self._stats.incr('hits')
+            return snapshot
+
+        return self._load(name, signature)
+
+    def _load(self, name, signature):
+        with self._lock:
+            current = self._snapshots.get(name)
+            # 其他线程可能已经完成了重新加载
+            if current is not None and current.signature == signature:
+                self._stats.incr('hits')
+                return current
+
+            _, builder, fallback, indexer = self._sources[name]
+            try:
+                raw, version = self._read(name)
+                data = builder(raw)
+                snapshot = DatasetSnapshot(
+                    name=name,
+                    data=data,
+                    version=version,
+                    signature=signature,
+                    loaded_at=time.time(),
+                    index=indexer(data) if indexer else None
+                )
+            except FileNotFoundError:
+                data = fallback()
+                snapshot = DatasetSnapshot(name, data, 'fallback', signature, time.time(),
+                                           indexer(data) if indexer else None)
+            except (ValueError, KeyError) as e:
+                self._stats.incr('errors')
+                if current is None:
+                    raise
+                logger.warning("数据集 %s 解析失败，继续使用旧版本 %s: %s", name, current.version, e)
+                self._next_check[name] = time.monotonic() + self.check_interval
+                return current
+
+            if current is None:
+                self._stats.incr('misses')
+            else:
+                self._stats.incr('reloads')
+                logger.info("数据集 %s 已重新加载: %s -> %s", name, current.version, snapshot.version)
+
+            self._snapshots[name] = snapshot
+            self._next_check[name] = time.monotonic() + self.check_interval
+            return snapshot
+
+    def _read(self, name):
+        """读取并解析JSON文件，返回 (数据, 版本号)"""
+        with open(self.path(name), 'rb') as f:
+            raw = f.read()
+        return parse_json(raw), hashlib.sha1(raw).hexdigest()[:16]
+
+    def read_raw(self, name):
+        """读取数据集的原始数据（未经builder转换），返回 (数据, 版本号)；文件不存在时返回空数据"""
+        try:
+            return self._read(name)
+        except FileNotFoundError:
+            return {}, None
+
+    def reload(self, name=None):
+        """显式重新加载信号：下次访问时强制检查文件（name为空时作用于所有数据集）"""
+        names = [name] if name else list(self._sources)
+        for n in names:
+            self._next_check.pop(n, None)
+            current = self._snapshots.get(n)
+            if current is not None:
+                # 清空签名，确保即使 mtime/size 未变化也会重新加载
+                self._snapshots[n] = current._replace(signature=None)
+
+    def versions(self):
+        """返回各数据集当前版本号"""
+        return {name: self.get(name).version for name in self._sources}
+
+    def stats(self):
+        """返回缓存命中统计"""
+        return dict(self._stats.snapshot(), datasets={
+            name: {'version': s.version, 'loaded_at': s.loaded_at}
+            for name, s in self._snapshots.items()
+        })
+
+
+def _build_china_data(data):
+    # 为前端提供简化格式
+    simplified_provinces = []
+    for province in data['provinces']:
+        simplified_provinces.append({
+            'name': province['name'],
+            'diabetes_rate': province['total_rate'],
+            'population': province['population'],
+            'cases': province['cases'],
+            'male_rate': province['male_rate'],
+            'female_rate': province['female_rate']
+        })
+
+    return {
+        'provinces': simplified_provinces,
+        'metadata': data['metadata'],
+        'summary': data['summary'],
+        'regions': data['regions']
+    }
+
+
+def _index_china_data(data):
+    provinces = {}
+    for province in data.get('provinces', []):
+        # 与按顺序查找的语义一致：重名时取第一个
+        provinces.setdefault(province['name'], province)
+
+    # 一次遍历省份列表完成分组，区域内省份保持数据文件中的顺序
+    province_regions = defaultdict(list)
+    for region_name, names in data.get('regions', {}).items():
+        for province_name in set(names):
+            province_regions[province_name].append(region_name)
+    regions = {region_name: [] for region_name in data.get('regions', {})}
+    for province in data.get('provinces', []):
+        for region_name in province_regions.get(province['name'], ()):
+            regions[region_name].append(province)
+
+    region_summaries = {
+        region_name: {
+            'total_population': sum(p['population'] for p in members),
+            'total_cases': sum(p['cases'] for p in members),
+            'avg_rate': round(sum(p['diabetes_rate'] for p in members) / len(members), 2) if members else 0
+        }
+        for region_name, members in regions.items()
+    }
+
+    all_provinces = data.get('provinces', [])
+    if all_provinces:
+        national_summary = {
+            'average_rate': sum(p['diabetes_rate'] for p in all_provinces) / len(all_provinces),
+            'total_population': sum(p.get('population', 0) for p in all_provinces),
+            'total_cases': sum(p.get('cases', 0) for p in all_provinces),
+            'provinces_count': len(all_provinces)
+        }
+    else:
+        national_summary = {
+            'average_rate': 8.8,
+            'total_population': 1400000000,
+            'total_cases': 123200000,
+            'provinces_count': 0
+        }
+    return ChinaIndex(provinces, regions, region_summaries, national_summary)
+
+
+def _fallback_china_data():
+    # 返回示例数据
+    return {
+        "provinces": [
+            {"name": "北京", "diabetes_rate": 8.5, "population": 2154, "cases": 183},
+            {"name": "上海", "diabetes_rate": 9.2, "population": 2428, "cases": 223},
+        ],
+        "metadata": {
+            "data_source": "fallback",
+            "last_updated": "2025-07-15"
+        }
+    }
+
+
+def _build_international_data(data):
+    # 为前端提供简化格式
+    simplified_continents = []
+    for continent in data['continents']:
+        simplified_continents.append({
+            'name': continent['name'],
+            'diabetes_rate': continent['diabetes_rate'],
+            'population': continent['population'],
+            'cases': continent['cases'],
+            'countries': continent['countries']
+        })
+
+    return {
+        'continents': simplified_continents,
+        'metadata': data['metadata'],
+        'summary': data['summary'],
+        'global_trends': data['global_trends'],
+        'risk_levels': data['risk_levels']
+    }
+
+
+def _fallback_international_data():
+    # 返回示例数据
+    return {
+        "continents": [
+            {"name": "亚洲", "diabetes_rate": 60.0, "countries": 48},
+            {"name": "欧洲", "diabetes_rate": 6.2, "countries": 44},
+        ],
+        "metadata": {
+            "data_source": "fallback",
+            "last_updated": "2025-07-15"
+        }
+    }
+
+
+def _fallback_trends_data():
+    return {
+        "years": [2010, 2015, 2020, 2025],
+        "global_rates": [6.4, 7.2, 8.5, 9.2],
+        "china_rates": [7.8, 8.6, 9.8, 10.6]
+    }
+
+
+dataset_cache = DatasetCache()
+dataset_cache.register('china', 'china_data.json', _build_china_data, _fallback_china_data, _index_china_data)
+dataset_cache.register('international', 'international_data.json', _build_international_data, _fallback_international_data)
+dataset_cache.register('trends', 'trends_data.json', lambda data: data, _fallback_trends_data)
+
+
+def load_china_data():
+    """加载中国省份糖尿病数据"""
+    return dataset_cache.get('china').data
+
+def china_index():
+    """获取中国数据集的查找索引（ChinaIndex），随数据集一起加载和替换"""
+    return dataset_cache.get('china').index
+
+def load_international_data():
+    """加载国际糖尿病数据"""
+    return dataset_cache.get('international').data
+
+def load_trends_data():
+    """加载趋势数据"""
+    return dataset_cache.get('trends').data
+
+def reload_datasets(name=None):
+    """通知缓存数据文件已更新"""
+    dataset_cache.reload(name)
@@ -0,0 +1,99 @@
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, request, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.counters import Counters
+
+
+def _request_user_id():
+    """当前请求的用户ID（不触发用户加载）：已加载的用户、JWT声明或Flask-Login会话"""
+    user = g.get('_login_user')
+    if user is not None and getattr(user, 'is_authenticated', False):
+        return str(user.id)
+    jwt_data = g.get('_jwt_extended_jwt')
+    if jwt_data and jwt_data.get('sub') is not None:
+        return str(jwt_data['sub'])
+    user_id = session.get('_user_id')
+    return str(user_id) if user_id is not None else None
+
+
+class ReplicaRouter:
+    """
+    读写分离路由
+    - 配置了 replica 数据库（SQLALCHEMY_BINDS['replica']）时，标记为只读的路由中的SELECT发往从库
+    - 写入（flush、INSERT/UPDATE/DELETE）以及未标记路由中的所有查询都发往主库
+    - 读己之写：用户提交写入后 sticky_seconds 秒内，该用户的请求全部读主库，避免读到复制延迟前的旧数据
+    - 粘滞状态保存在进程内，多进程部署时 sticky_seconds 应大于复制延迟
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 5.0
+        self._sticky = {}   # user_id -> 粘滞截止时间
+        self._lock = threading.Lock()
+        self._listeners_registered = False
+        self._stats = Counters(replica_reads=0, primary_reads=0, writes=0, sticky_reads=0)
+
+    def init_app(self, app):
+        self.enabled = 'replica' in app.config.get('SQLALCHEMY_BINDS', {})
+        self.sticky_seconds = app.config['DB_REPLICA_STICKY_SECONDS']
+        if not self._listeners_registered:
+            self._listeners_registered = True
+            event.listen(Session, 'after_commit', self._after_commit)
+
+    def use_replica(self):
+        """当前查询是否应发往从库（由 RoutingSession.get_bind 调用）"""
+        if not has_request_context() or not g.get('_db_replica'):
+            self._stats.incr('primary_reads')
+            return False
+        user_id = _request_user_id()
+        if user_id is not None and self._sticky.get(user_id, 0) > time.monotonic():
+            g._db_replica = False
+            self._stats.incr('sticky_reads')
+            return False
+        self._stats.incr('replica_reads')
+        return True
+
+    def record_write(self):
+        self._stats.incr('writes')
+        if has_request_context():
+            g._db_wrote = True
+
+    def _after_commit(self, db_session):
+        if not has_request_context() or not g.pop('_db_wrote', False):
+            return
+        # 本请求之后的查询也读主库
+        g._db_replica = False
+        user_id = _request_user_id()
+        if user_id is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._sticky[user_id] = now + self.sticky_seconds
+            if len(self._sticky) > 10000:
+                self._sticky = {uid: until for uid, until in self._sticky.items() if until > now}
+
+    def stats(self):
+        return dict(self._stats.snapshot(), enabled=self.enabled, sticky_users=len(self._sticky))
+
+
+replica_router = ReplicaRouter()
+
+
+def replica_reads(fn=None, *, methods=None):
+    """
+    只读路由装饰器：路由中的查询从从库读取
+    methods 指定只对哪些HTTP方法生效（例如同一路由的POST读取、PUT写入）
+    """
+    if fn is None:
+        return lambda f: replica_reads(f, methods=methods)
+
+    @wraps(fn)
+    def decorated_function(*args, **kwargs):
+        if replica_router.enabled and (methods is None or request.method in methods):
+            g._db_replica = True
+        return fn(*args, **kwargs)
+
+    return decorated_function
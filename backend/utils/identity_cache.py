@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import g
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from models import db, User
+from utils.counters import Counters
+
+
+class IdentityCache:
+    """
+    已认证用户缓存
+    - 请求级：同一请求内JWT加载器、Flask-Login和路由代码共用一个User实例
+    - 进程级：按ID缓存用户记录的列值（LRU，容量和有效期有上限），命中时不访问数据库
+    - 缓存的是列值快照而不是ORM实例，命中时构造游离实例并通过 merge(load=False) 关联到当前会话
+    - 本进程内对User的更新/删除在事务提交后使缓存失效；其他进程的修改最多延迟 ttl 秒可见
+    """
+
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # user_id -> (过期时间, updated_at, 列值)
+        self._lock = threading.Lock()
+        self._listeners_registered = False
+        self._stats = Counters(hits=0, misses=0, request_hits=0, invalidations=0, evictions=0)
+
+    def init_app(self, app):
+        self.maxsize = app.config['IDENTITY_CACHE_SIZE']
+        self.ttl = app.config['IDENTITY_CACHE_TTL']
+        if not self._listeners_registered:
+            self._listeners_registered = True
+            event.listen(User, 'after_update', self._mark_dirty)
+            event.listen(User, 'after_delete', self._mark_dirty)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def get(self, user_id):
+        """按ID获取用户，返回关联到当前会话的User实例，用户不存在时返回None"""
+        memo = g.setdefault('_identity_memo', {})
+        user = memo.get(user_id)
+        if user is not None:
+            self._stats.incr('request_hits')
+            return user
+
+        row = self._lookup(user_id)
+        if row is not None:
+            self._stats.incr('hits')
+            user = User(**row)
+            make_transient_to_detached(user)
+            user = db.session.merge(user, load=False)
+        else:
+            self._stats.incr('misses')
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            self.put(user)
+
+        memo[user_id] = user
+        return user
+
+    def _lookup(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[2]
+
+    def put(self, user):
+        """缓存用户记录；已缓存的记录比传入的更新时不覆盖"""
+        row = {column.key: getattr(user, column.key) for column in inspect(User).column_attrs}
+        with self._lock:
+            current = self._entries.get(user.id)
+            if current is not None and current[1] and row['updated_at'] and current[1] > row['updated_at']:
+                return
+            self._entries[user.id] = (time.monotonic() + self.ttl, row['updated_at'], row)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats.incr('evictions')
+
+    def invalidate(self, user_id=None):
+        """使指定用户（user_id为空时为全部用户）的缓存失效"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            elif self._entries.pop(user_id, None) is None:
+                return
+            self._stats.incr('invalidations')
+
+    def _mark_dirty(self, mapper, connection, target):
+        # 刷新到数据库时只做标记，提交后再失效，避免其他线程在提交前重新缓存旧数据
+        session = inspect(target).session
+        if session is not None:
+            session.info.setdefault('identity_cache_dirty', set()).add(target.id)
+        else:
+            self.invalidate(target.id)
+
+    def _after_commit(self, session):
+        for user_id in session.info.pop('identity_cache_dirty', ()):
+            self.invalidate(user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop('identity_cache_dirty', None)
+
+    def stats(self):
+        stats = self._stats.snapshot()
+        lookups = stats['hits'] + stats['misses']
+        return dict(
+            stats,
+            entries=len(self._entries),
+            maxsize=self.maxsize,
+            ttl=self.ttl,
+            hit_ratio=round(stats['hits'] / lookups, 4) if lookups else 0.0
+        )
+
+
+identity_cache = IdentityCache()
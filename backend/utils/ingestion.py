@@ -0,0 +1,506 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date
+from fractions import Fraction
+from utils.data_loader import dataset_cache
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl为可选依赖，未安装时只能导入CSV
+    openpyxl = None
+
+try:
+    import fcntl
+except ImportError:  # Windows没有fcntl，只能在进程内互斥（单进程运行）
+    fcntl = None
+
+SOURCE_FORMATS = ('csv', 'xlsx')
+INGEST_MODES = ('merge', 'replace')
+
+# 字段定义：kind 为 str/number/int/rate（0-100的百分比，可带%）/list（以 ; 、 分隔的文本列表）
+# required 为必填；omit_empty 为空时不写入该键（而不是写入null）；aliases 为可识别的表头别名（如中文表头）
+Field = namedtuple('Field', ['name', 'kind', 'required', 'omit_empty', 'aliases'])
+
+PROVINCE_FIELDS = (
+    Field('name', 'str', True, False, ('省份', '地区', '名称')),
+    Field('male_rate', 'rate', False, False, ('男性患病率',)),
+    Field('female_rate', 'rate', False, False, ('女性患病率',)),
+    Field('total_rate', 'rate', True, False, ('总患病率', '患病率')),
+    Field('population', 'number', True, False, ('人口', '人口(万人)')),
+    Field('cases', 'number', True, False, ('病例数', '患者数', '患者数(万人)')),
+    Field('summary', 'str', False, False, ('概述', '说明')),
+)
+CONTINENT_FIELDS = (
+    Field('name', 'str', True, False, ('大洲', '名称')),
+    Field('diabetes_rate', 'rate', False, False, ('患病率',)),
+    Field('population', 'number', True, False, ('人口', '人口(百万)')),
+    Field('cases', 'number', False, False, ('病例数', '患者数', '患者数(百万)')),
+    Field('countries', 'int', True, False, ('国家数',)),
+    Field('summary', 'str', False, False, ('概述', '说明')),
+    Field('trend', 'str', False, False, ('趋势',)),
+    Field('risk_factors', 'list', False, False, ('风险因素',)),
+    Field('note', 'str', False, True, ('备注',)),
+)
+# 省份所属区域：可选列，填写时将该省份移入对应区域
+REGION_FIELD = Field('region', 'str', False, True, ('区域',))
+
+LIST_SEPARATORS = (';', '；', '、')
+
+# 患病率分级（与 international_data.json 中 risk_levels 的划分一致）
+RISK_LEVELS = (
+    ('high', '>10%', lambda rate: rate > 10),
+    ('medium', '5-10%', lambda rate: 5 <= rate <= 10),
+    ('low', '<5%', lambda rate: rate < 5),
+)
+
+_publish_lock = threading.Lock()
+
+
+@contextmanager
+def _dataset_lock(name):
+    """
+    数据集导入锁：读取当前数据、合并、发布整个过程互斥
+    gunicorn多个工作进程都可能处理导入请求，因此对数据文件旁的锁文件（<数据文件>.lock）加文件锁，
+    同一进程内的多个线程由 _publish_lock 互斥
+    """
+    with _publish_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(dataset_cache.path(name) + '.lock', 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class IngestionError(ValueError):
+    """源文件无法读取（格式不支持、缺少表头等），不针对单行数据"""
+
+
+def _parse_number(text):
+    text = text.replace(',', '').replace('，', '')
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _convert(field, value):
+    """将单元格的值转换为字段类型，返回 (值, 错误信息)"""
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == '':
+        if field.required:
+            return None, '缺少字段: %s' % field.name
+        return None, None
+
+    if field.kind == 'str':
+        return str(value), None
+    if field.kind == 'list':
+        if isinstance(value, list):
+            return value, None
+        text = str(value)
+        for separator in LIST_SEPARATORS[1:]:
+            text = text.replace(separator, LIST_SEPARATORS[0])
+        return [item.strip() for item in text.split(LIST_SEPARATORS[0]) if item.strip()], None
+
+    if isinstance(value, str):
+        try:
+            value = _parse_number(value[:-1] if field.kind == 'rate' and value.endswith('%') else value)
+        except ValueError:
+            return None, '%s 必须是数字' % field.name
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return None, '%s 必须是数字' % field.name
+    if field.kind == 'int':
+        if value != int(value):
+            return None, '%s 必须是整数' % field.name
+        value = int(value)
+    if value < 0:
+        return None, '%s 不能为负数' % field.name
+    if field.kind == 'rate' and value > 100:
+        return None, '%s 必须在0-100之间' % field.name
+    return value, None
+
+
+class Aggregate:
+    """
+    可增减的汇总（计数、求和、均值）
+    - 用Fraction精确累加，替换或删除记录后的结果与全部重新计算完全一致，不累积浮点误差
+    - 输入全部为整数时求和结果为整数
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.floats = 0
+        self.total = Fraction(0)
+
+    def add(self, value, sign=1):
+        if value is None:
+            return
+        self.count += sign
+        self.floats += sign * isinstance(value, float)
+        self.total += sign * Fraction(value)
+
+    def sum(self):
+        return float(self.total) if self.floats else int(self.total)
+
+    def mean(self, ndigits):
+        return round(float(self.total / self.count), ndigits) if self.count else 0
+
+
+class DatasetIngestion:
+    """
+    一类数据集的导入规则：记录列表所在的键、字段定义，以及汇总的增量维护方式
+    子类实现 _apply（加入/移除一条记录对汇总的影响）和 assemble（生成完整数据集，元数据只更新计数）
+    """
+
+    dataset = None
+    table = None
+    fields = ()
+    extra_fields = ()
+
+    def __init__(self, current):
+        self.current = current
+        self.rows = {}
+
+    def header_map(self, header):
+        """表头 -> 字段，缺少必填列时报错"""
+        lookup = {}
+        for field in self.fields + self.extra_fields:
+            for alias in (field.name,) + field.aliases:
+                lookup[alias.lower()] = field
+        mapping = {}
+        for position, title in enumerate(header):
+            field = lookup.get(str(title or '').strip().lower())
+            if field is not None and field not in mapping.values():
+                mapping[position] = field
+        missing = [f.name for f in self.fields if f.required and f not in mapping.values()]
+        if missing:
+            raise IngestionError('缺少必填列: %s' % ', '.join(missing))
+        return mapping
+
+    def normalize(self, values, mapping):
+        """校验并规范化一行，返回 (记录, 附加字段, 错误信息)；记录的键按字段定义的顺序"""
+        converted = {}
+        for position, field in mapping.items():
+            value = values[position] if position < len(values) else None
+            converted[field.name], error = _convert(field, value)
+            if error:
+                return None, None, error
+        for field in self.fields:
+            if field.required and converted.get(field.name) is None:
+                return None, None, '缺少字段: %s' % field.name
+        row = {}
+        for field in self.fields:
+            value = converted.get(field.name)
+            if value is None and field.omit_empty:
+                continue
+            row[field.name] = value
+        extra = {f.name: converted[f.name] for f in self.extra_fields if converted.get(f.name) is not None}
+        return row, extra, None
+
+    def validate_extra(self, extra):
+        return None
+
+    def seed(self):
+        """合并模式：以当前数据集的记录为起点"""
+        for row in self.current.get(self.table, []):
+            self.put(row)
+
+    def put(self, row, extra=None, provided=None):
+        """
+        加入或替换一条记录（按名称），汇总只做增量调整；返回是否为新增
+        provided 为源文件中包含的字段：替换已有记录时，源文件没有的列保留原值
+        """
+        previous = self.rows.get(row['name'])
+        if previous is not None:
+            self._apply(previous, -1)
+            if provided is not None:
+                row = self._merge(previous, row, provided)
+        self.place(row, extra or {})
+        self.rows[row['name']] = row
+        self._apply(row, 1)
+        return previous is None
+
+    def _merge(self, previous, row, provided):
+        merged = {}
+        for field in self.fields:
+            value = row.get(field.name) if field.name in provided else previous.get(field.name)
+            if value is not None or not field.omit_empty:
+                merged[field.name] = value
+        return merged
+
+    def place(self, row, extra):
+        pass
+
+    def _apply(self, row, sign):
+        raise NotImplementedError
+
+    def assemble(self):
+        raise NotImplementedError
+
+    def build(self, source_name):
+        """
+        生成完整数据集：记录或汇总有变化时才更新数据来源和更新日期，
+        重复导入相同的内容时数据集不变，版本号和ETag保持不变
+        """
+        data = self.assemble()
+        if any(value != self.current.get(key) for key, value in data.items() if key != 'metadata'):
+            data['metadata'].update(data_source=source_name, last_updated=date.today().isoformat())
+        return data
+
+    def _metadata(self, **counts):
+        metadata = dict(self.current.get('metadata', {}))
+        metadata.update(counts)
+        return metadata
+
+
+class ChinaIngestion(DatasetIngestion):
+    """省份数据：全国汇总和各区域汇总随记录增量维护"""
+
+    dataset = 'china'
+    table = 'provinces'
+    fields = PROVINCE_FIELDS
+    extra_fields = (REGION_FIELD,)
+
+    def __init__(self, current):
+        super().__init__(current)
+        self.regions = {name: list(members) for name, members in current.get('regions', {}).items()}
+        self.totals = {key: Aggregate() for key in ('population', 'cases', 'total_rate')}
+        self.region_totals = {name: {key: Aggregate() for key in self.totals} for name in self.regions}
+
+    def validate_extra(self, extra):
+        region = extra.get('region')
+        if region is not None and region not in self.regions:
+            return '未知的区域: %s（可选值: %s）' % (region, ', '.join(self.regions))
+        return None
+
+    def place(self, row, extra):
+        region = extra.get('region')
+        if region is None:
+            return
+        for name, members in self.regions.items():
+            if name != region and row['name'] in members:
+                members.remove(row['name'])
+        if row['name'] not in self.regions[region]:
+            self.regions[region].append(row['name'])
+
+    def _apply(self, row, sign):
+        targets = [self.totals] + [self.region_totals[name] for name, members in self.regions.items()
+                                   if row['name'] in members]
+        for totals in targets:
+            for key, aggregate in totals.items():
+                aggregate.add(row[key], sign)
+
+    def region_summaries(self):
+        return {
+            name: {
+                'total_population': totals['population'].sum(),
+                'total_cases': totals['cases'].sum(),
+                'avg_rate': totals['total_rate'].mean(2)
+            }
+            for name, totals in self.region_totals.items()
+        }
+
+    def assemble(self):
+        return {
+            'metadata': self._metadata(total_provinces=len(self.rows)),
+            'summary': {
+                'total_population': self.totals['population'].sum(),
+                'total_cases': self.totals['cases'].sum(),
+                'avg_diabetes_rate': self.totals['total_rate'].mean(2)
+            },
+            'provinces': list(self.rows.values()),
+            'regions': self.regions
+        }
+
+
+class InternationalIngestion(DatasetIngestion):
+    """大洲数据：汇总只统计有患病率数据的大洲，风险分级按患病率重新划分"""
+
+    dataset = 'international'
+    table = 'continents'
+    fields = CONTINENT_FIELDS
+
+    def __init__(self, current):
+        super().__init__(current)
+        self.totals = {key: Aggregate() for key in ('population', 'cases', 'diabetes_rate', 'countries')}
+
+    def _apply(self, row, sign):
+        if row['diabetes_rate'] is None:
+            return
+        for key, aggregate in self.totals.items():
+            aggregate.add(row[key], sign)
+
+    def region_summaries(self):
+        return None
+
+    def assemble(self):
+        rated = [row for row in self.rows.values() if row['diabetes_rate'] is not None]
+        summary = {
+            'total_population': self.totals['population'].sum(),
+            'total_cases': self.totals['cases'].sum(),
+            'avg_diabetes_rate': self.totals['diabetes_rate'].mean(1),
+            'total_countries': self.totals['countries'].sum(),
+        }
+        if rated:
+            summary['highest_rate_continent'] = max(rated, key=lambda row: row['diabetes_rate'])['name']
+            summary['lowest_rate_continent'] = min(rated, key=lambda row: row['diabetes_rate'])['name']
+        risk_levels = [
+            {'level': level, 'range': label, 'continents': [row['name'] for row in rated if test(row['diabetes_rate'])]}
+            for level, label, test in RISK_LEVELS
+        ]
+        risk_levels.append({'level': 'unknown', 'range': '无数据',
+                            'continents': [name for name, row in self.rows.items() if row['diabetes_rate'] is None]})
+        return {
+            'metadata': self._metadata(total_continents=len(rated)),
+            'summary': summary,
+            'continents': list(self.rows.values()),
+            'global_trends': self.current.get('global_trends', {}),
+            'risk_levels': risk_levels
+        }
+
+
+INGESTIONS = {cls.dataset: cls for cls in (ChinaIngestion, InternationalIngestion)}
+
+
+def source_format(filename):
+    """按扩展名判断源文件格式"""
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return extension if extension in SOURCE_FORMATS else 'csv'
+
+
+def iter_source_rows(stream, file_format):
+    """
+    逐行读取源文件（首行为表头），不整体载入内存
+    csv: 二进制或文本流，按UTF-8（可带BOM）解码；xlsx: 需要openpyxl，以只读模式按行读取第一个工作表
+    """
+    if file_format == 'csv':
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        # 按行解码，编码错误在读到对应行时才出现
+        try:
+            yield from csv.reader(stream)
+        except UnicodeDecodeError:
+            raise IngestionError('文件需为UTF-8编码的CSV（Excel中可另存为“CSV UTF-8”）')
+        except csv.Error as e:
+            raise IngestionError('CSV格式错误: %s' % e)
+    elif file_format == 'xlsx':
+        if openpyxl is None:
+            raise IngestionError('导入xlsx文件需要安装openpyxl（pip install openpyxl）')
+        # 损坏或并非xlsx的文件可能引发 BadZipFile、KeyError（缺少工作簿部件）、XML解析错误等多种异常
+        try:
+            workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        except Exception as e:
+            raise IngestionError('无法读取xlsx文件（文件损坏或不是xlsx格式）: %s' % e)
+        try:
+            for values in workbook.worksheets[0].iter_rows(values_only=True):
+                yield list(values)
+        except Exception as e:
+            raise IngestionError('无法读取xlsx文件（文件损坏或不是xlsx格式）: %s' % e)
+        finally:
+            workbook.close()
+    else:
+        raise IngestionError('不支持的文件格式: %s（可选值: %s）' % (file_format, ', '.join(SOURCE_FORMATS)))
+
+
+def ingest(name, rows, source_name, mode='merge', allow_errors=False, dry_run=False, max_rows=None):
+    """
+    导入数据集
+    - rows 为逐行产生的单元格列表（首行为表头），逐行校验、规范化，并增量更新汇总
+    - merge: 以当前数据集为起点，按名称新增或替换记录；replace: 只保留本次导入的记录
+    - 存在校验错误时默认不发布（allow_errors 为真时跳过错误行）；dry_run 只校验不发布
+    - 多个进程同时导入同一数据集时依次进行（文件锁），后一次导入基于前一次发布的数据
+    - 发布时原子替换数据文件，运行中的服务在下次检查文件时加载新版本（gunicorn主进程同时平滑重启工作进程），无需重启
+    返回导入报告
+    """
+    if name not in INGESTIONS:
+        raise IngestionError('数据集 %s 不支持导入（可选值: %s）' % (name, ', '.join(INGESTIONS)))
+    if mode not in INGEST_MODES:
+        raise IngestionError('不支持的导入方式: %s（可选值: %s）' % (mode, ', '.join(INGEST_MODES)))
+
+    with _dataset_lock(name):
+        current, current_version = dataset_cache.read_raw(name)
+        job = INGESTIONS[name](current)
+        if mode == 'merge':
+            job.seed()
+
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            raise IngestionError('源文件为空')
+        mapping = job.header_map(header)
+        name_position = next(position for position, field in mapping.items() if field.name == 'name')
+        provided = {field.name for field in mapping.values()}
+
+        report = {'dataset': name, 'mode': mode, 'rows': 0, 'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+        seen = set()
+        # 表头为第1行，数据行号从2开始，与表格软件中显示的行号一致
+        for line, values in enumerate(rows, start=2):
+            if not any(v is not None and str(v).strip() for v in values):
+                continue
+            report['rows'] += 1
+            if max_rows is not None and report['rows'] > max_rows:
+                raise IngestionError('单次最多导入%d行' % max_rows)
+            row, extra, error = job.normalize(values, mapping)
+            if error is None:
+                error = job.validate_extra(extra)
+            if error is None and row['name'] in seen:
+                error = '文件内重复: %s' % row['name']
+            if error is not None:
+                raw_name = values[name_position] if name_position < len(values) else None
+                report['errors'].append({'row': line, 'name': str(raw_name).strip() if raw_name is not None else None,
+                                         'error': error})
+                continue
+            seen.add(row['name'])
+            report['inserted' if job.put(row, extra, provided) else 'updated'] += 1
+        report['failed'] = len(report['errors'])
+
+        data = job.build(source_name)
+        report.update(summary=data['summary'], regions=job.region_summaries(),
+                      previous_version=current_version, version=None, published=False)
+        if dry_run or (report['errors'] and not allow_errors) or not (report['inserted'] or report['updated']):
+            return report
+        report['version'] = publish_dataset(name, data)
+        report['published'] = report['version'] != current_version
+        return report
+
+
+def publish_dataset(name, data):
+    """
+    原子发布数据集：写入临时文件后替换JSON文件
+    内容未变化时不写文件；返回新版本号（与加载时的版本号计算方式一致）
+    """
+    json_path = dataset_cache.path(name)
+    raw = (json.dumps(data, ensure_ascii=False, indent=2) + '\n').encode('utf-8')
+    version = hashlib.sha1(raw).hexdigest()[:16]
+    try:
+        with open(json_path, 'rb') as f:
+            if hashlib.sha1(f.read()).hexdigest()[:16] == version:
+                return version
+    except FileNotFoundError:
+        pass
+
+    tmp_path = '%s.%d.tmp' % (json_path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, json_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    dataset_cache.reload(name)
+    return version
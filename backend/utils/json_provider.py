@@ -0,0 +1,61 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    应用的JSON序列化
+    - 中文等非ASCII字符直接输出UTF-8，不转义为 \\uXXXX
+    - 始终紧凑输出（包括debug模式），键排序，保证相同数据得到相同字节（预渲染响应的ETag依赖这一点）
+    - 安装了orjson且 JSON_ACCELERATED 开启时使用orjson；datetime、Decimal等类型仍交给Flask的默认转换，
+      输出格式与标准库实现一致；orjson无法处理的数据（如超出64位的整数）回退到标准库
+    """
+
+    ensure_ascii = False
+    sort_keys = True
+    compact = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.accelerated = orjson is not None and app.config.get('JSON_ACCELERATED', True)
+        if self.accelerated:
+            self._options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    @property
+    def encoder(self):
+        return 'orjson' if self.accelerated else 'json'
+
+    def dumps_bytes(self, obj):
+        """序列化为UTF-8字节"""
+        if self.accelerated:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options)
+            except orjson.JSONEncodeError:
+                pass
+        return self.dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.accelerated and not kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options).decode('utf-8')
+            except orjson.JSONEncodeError:
+                pass
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.accelerated and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,135 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from flask import g, has_request_context, request
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class AsyncLogging:
+    """
+    非阻塞日志输出
+    - 根日志器只挂一个 QueueHandler，记录入队即返回，不在请求线程中做I/O
+    - QueueListener 后台线程负责格式化并写入 stderr
+    - 队列有上限，写满时丢弃新记录并计数，而不是阻塞请求
+    """
+
+    def __init__(self):
+        self.queue = None
+        self.listener = None
+        self.dropped = 0
+        self._handler = None
+        self._hooks_registered = False
+
+    def configure(self, level='INFO', queue_size=10000, fmt=LOG_FORMAT):
+        root = logging.getLogger()
+        root.setLevel(level)
+        if self._handler is not None:
+            return
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._handler = _DroppingQueueHandler(self)
+        root.addHandler(self._handler)
+        self._stream_handler = logging.StreamHandler()
+        self._stream_handler.setFormatter(logging.Formatter(fmt))
+        self._start_listener()
+
+        if not self._hooks_registered:
+            self._hooks_registered = True
+            atexit.register(self.stop)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._start_listener)
+
+    def _start_listener(self):
+        # fork后子进程没有监听线程，需要重新启动
+        if self.queue is None:
+            return
+        self.listener = logging.handlers.QueueListener(self.queue, self._stream_handler, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """停止监听线程并写出队列中剩余的日志"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'dropped': self.dropped
+        }
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, owner):
+        super().__init__(owner.queue)
+        self.owner = owner
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.owner.dropped += 1
+
+
+class DebugSampler:
+    """
+    按路由限流的调试日志采样
+    - 仅在日志器启用DEBUG级别时生效，否则一次级别判断后直接返回
+    - 每个请求按 rate 概率抽样，同一路由每分钟最多追踪 per_minute 个请求
+    - 抽样结果缓存在 g 中，同一请求的调试日志要么全部输出，要么全部跳过
+    """
+
+    def __init__(self, rate=0.1, per_minute=60):
+        self.rate = rate
+        self.per_minute = per_minute
+        self._windows = {}   # endpoint -> [窗口开始时间, 已追踪请求数]
+        self._lock = threading.Lock()
+        self.sampled = 0
+
+    def configure(self, rate, per_minute):
+        self.rate = rate
+        self.per_minute = per_minute
+
+    def __call__(self, logger):
+        if not logger.isEnabledFor(logging.DEBUG) or not has_request_context():
+            return False
+        decision = g.get('_debug_trace')
+        if decision is None:
+            decision = self._sample(request.endpoint)
+            g._debug_trace = decision
+        return decision
+
+    def _sample(self, endpoint):
+        if self.rate < 1.0 and random.random() >= self.rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None or now - window[0] >= 60:
+                window = self._windows[endpoint] = [now, 0]
+            if window[1] >= self.per_minute:
+                return False
+            window[1] += 1
+            self.sampled += 1
+        return True
+
+
+async_logging = AsyncLogging()
+debug_trace = DebugSampler()
+
+
+def init_logging(app):
+    """按配置初始化后端日志"""
+    async_logging.configure(level=app.config['LOG_LEVEL'], queue_size=app.config['LOG_QUEUE_SIZE'])
+    debug_trace.configure(app.config['LOG_DEBUG_SAMPLE_RATE'], app.config['LOG_DEBUG_PER_MINUTE'])
+
+
+def logging_stats():
+    return dict(async_logging.stats(), level=logging.getLevelName(logging.getLogger().level),
+                debug_sampled=debug_trace.sampled)
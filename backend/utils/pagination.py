@@ -0,0 +1,54 @@
+import base64
+from datetime import datetime
+
+
+class InvalidQueryParameter(ValueError):
+    """查询参数无效，调用方应返回400"""
+
+
+def encode_cursor(assessment_date, record_id):
+    """将排序键 (assessment_date, id) 编码为不透明的游标字符串"""
+    raw = f"{assessment_date.isoformat()}|{record_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (assessment_date, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        date_part, id_part = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidQueryParameter("无效的分页游标")
+
+
+def parse_limit(value, default, maximum):
+    """解析每页条数，限制在 1..maximum 之间"""
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidQueryParameter("limit必须是整数")
+    return max(1, min(limit, maximum))
+
+
+def parse_datetime(value, name):
+    """解析ISO格式的日期/时间参数"""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidQueryParameter(f"{name}必须是ISO格式的日期，例如2025-01-31")
+
+
+def parse_fields(value, allowed, default):
+    """解析逗号分隔的字段列表"""
+    if not value:
+        return list(default)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise InvalidQueryParameter(f"不支持的字段: {', '.join(unknown)}，可选值: {', '.join(allowed)}")
+    return fields
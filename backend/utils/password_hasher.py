@@ -0,0 +1,168 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from utils.counters import Counters
+
+
+class HasherBusyError(Exception):
+    """等待哈希计算的请求过多，调用方应返回503让客户端稍后重试"""
+
+
+def normalize_method(method):
+    """补全werkzeug哈希方法的默认参数，使其与存储的哈希前缀可比较"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        raise ValueError("不支持的密码哈希方法: %s" % method)
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+def _timed_hash(password, method):
+    started = time.perf_counter()
+    return generate_password_hash(password, method), (time.perf_counter() - started) * 1000
+
+
+def _timed_verify(pwhash, password):
+    started = time.perf_counter()
+    return check_password_hash(pwhash, password), (time.perf_counter() - started) * 1000
+
+
+class PasswordHasher:
+    """
+    密码哈希计算
+    - 哈希算法和成本通过 PASSWORD_HASH_METHOD 配置（werkzeug格式，如 scrypt:32768:8:1、pbkdf2:sha256:600000）
+    - workers > 0 时在独立的进程池中计算，不占用请求线程的GIL
+    - 同时等待的任务数上限为 max_pending，超出后最多等待 acquire_timeout 秒，仍无空位则抛出 HasherBusyError
+    - 进程池在首次使用时创建，fork后的子进程会重新创建自己的进程池
+    """
+
+    def __init__(self):
+        self.method = normalize_method('scrypt')
+        self.workers = 0
+        self.max_pending = 0
+        self.acquire_timeout = 0
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._hooks_registered = False
+        self._stats = Counters(
+            hashes=0, verifications=0, rehashes=0, rejected=0,
+            total_hash_ms=0.0, max_hash_ms=0.0, total_wait_ms=0.0, max_wait_ms=0.0
+        )
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config['PASSWORD_HASH_METHOD'])
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_pending = app.config['PASSWORD_HASH_MAX_PENDING'] or self.workers * 4
+        self.acquire_timeout = app.config['PASSWORD_HASH_ACQUIRE_TIMEOUT']
+        self._slots = threading.BoundedSemaphore(self.max_pending) if self.workers else None
+        if not self._hooks_registered:
+            self._hooks_registered = True
+            atexit.register(self.shutdown)
+
+    def _get_executor(self):
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # forkserver避免在多线程进程中直接fork
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        started = time.perf_counter()
+        if not self.workers:
+            result, hash_ms = fn(*args)
+        else:
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                self._stats.incr('rejected')
+                raise HasherBusyError("密码哈希任务过多")
+            try:
+                result, hash_ms = self._get_executor().submit(fn, *args).result()
+            finally:
+                self._slots.release()
+
+        wait_ms = max((time.perf_counter() - started) * 1000 - hash_ms, 0.0)
+        self._stats.add(total_hash_ms=hash_ms, total_wait_ms=wait_ms)
+        self._stats.maximum('max_hash_ms', round(hash_ms, 3))
+        self._stats.maximum('max_wait_ms', round(wait_ms, 3))
+        return result
+
+    def hash(self, password):
+        """按当前配置的算法计算密码哈希"""
+        result = self._run(_timed_hash, password, self.method)
+        self._stats.incr('hashes')
+        return result
+
+    def hash_many(self, passwords):
+        """
+        批量计算密码哈希（批量导入用户），结果顺序与输入一致
+        - 任务按块分发到进程池的所有进程并行计算；workers为0时逐个计算
+        - 整批只占用一个排队名额，避免大批量导入挤占登录请求
+        """
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        started = time.perf_counter()
+        if not self.workers:
+            results = [_timed_hash(password, self.method) for password in passwords]
+        else:
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                self._stats.incr('rejected')
+                raise HasherBusyError("密码哈希任务过多")
+            try:
+                chunksize = max(1, len(passwords) // (self.workers * 4))
+                results = list(self._get_executor().map(
+                    _timed_hash, passwords, [self.method] * len(passwords), chunksize=chunksize))
+            finally:
+                self._slots.release()
+
+        hash_ms = sum(elapsed for _, elapsed in results)
+        # 并行计算时墙钟时间小于各任务耗时之和，排队等待按0计
+        wait_ms = max((time.perf_counter() - started) * 1000 - hash_ms, 0.0)
+        self._stats.add(hashes=len(results), total_hash_ms=hash_ms, total_wait_ms=wait_ms)
+        self._stats.maximum('max_hash_ms', round(max(e for _, e in results), 3))
+        return [pwhash for pwhash, _ in results]
+
+    def verify(self, pwhash, password):
+        """校验密码，使用存储的哈希中记录的算法和参数"""
+        result = self._run(_timed_verify, pwhash, password)
+        self._stats.incr('verifications')
+        return result
+
+    def needs_rehash(self, pwhash):
+        """存储的哈希算法或成本与当前配置不一致时返回True"""
+        return pwhash.split('$', 1)[0] != self.method
+
+    def record_rehash(self):
+        self._stats.incr('rehashes')
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def stats(self):
+        stats = self._stats.snapshot()
+        count = stats['hashes'] + stats['verifications']
+        return dict(
+            stats,
+            method=self.method,
+            workers=self.workers,
+            avg_hash_ms=round(stats['total_hash_ms'] / count, 3) if count else 0.0,
+            avg_wait_ms=round(stats['total_wait_ms'] / count, 3) if count else 0.0
+        )
+
+
+password_hasher = PasswordHasher()
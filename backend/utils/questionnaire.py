@@ -0,0 +1,155 @@
+import itertools
+from collections import namedtuple
+
+# 问卷定义：校验、编码和评分的唯一数据来源
+# - field：请求字段名；factor：risk_factors 中的因素名；default：评分时字段缺失的缺省值
+# - options：可选值、得分和中文描述；message：取值无效时的提示
+Option = namedtuple('Option', ['value', 'score', 'description'])
+Question = namedtuple('Question', ['field', 'factor', 'default', 'options', 'message'])
+
+QUESTIONNAIRE = (
+    Question('age_range', 'age', '20-39', (
+        Option('20-39', 0, '20-39岁'),
+        Option('40-49', 2, '40-49岁'),
+        Option('50-59', 3, '50-59岁'),
+        Option('60-69', 4, '60-69岁'),
+        Option('70+', 5, '70+岁')
+    ), "无效的年龄范围，可选值: 20-39, 40-49, 50-59, 60-69, 70+"),
+    Question('bmi_category', 'bmi', 'normal', (
+        Option('underweight', 0, '偏瘦'),
+        Option('normal', 1, '正常'),
+        Option('overweight', 3, '超重'),
+        Option('obese', 5, '肥胖')
+    ), "无效的BMI分类，可选值: underweight, normal, overweight, obese"),
+    Question('waist_status', 'waist', 'normal-male', (
+        Option('normal-male', 0, '腰围正常'),
+        Option('normal-female', 0, '腰围正常'),
+        Option('abnormal-male', 3, '腰围异常'),
+        Option('abnormal-female', 3, '腰围异常')
+    ), "无效的腰围状态，可选值: normal-male, normal-female, abnormal-male, abnormal-female"),
+    Question('family_history', 'family', 'no', (
+        Option('yes', 3, '有家族病史'),
+        Option('no', 0, '无家族病史')
+    ), "家族病史必须是'yes'或'no'"),
+    Question('physical_activity', 'activity', 'regular', (
+        Option('regular', 0, '规律运动'),
+        Option('irregular', 2, '运动不规律'),
+        Option('sedentary', 4, '久坐不动')
+    ), "无效的运动频率，可选值: regular, irregular, sedentary"),
+    Question('blood_pressure', 'blood_pressure', 'no', (
+        Option('yes', 3, '有高血压'),
+        Option('no', 0, '无高血压')
+    ), "高血压必须是'yes'或'no'"),
+    Question('glucose_history', 'glucose', 'no', (
+        Option('yes', 5, '有血糖异常史'),
+        Option('no', 0, '无血糖异常史')
+    ), "血糖异常史必须是'yes'或'no'")
+)
+
+# 取值不在问卷中时的因素描述（只会出现在未经校验直接评分的调用中），与原评分函数的输出保持一致：
+# 年龄为“原值+岁”，腰围按是否包含 normal 判断，是/否类问题非 yes 即视为 no；其余问题为原值
+UNKNOWN_DESCRIPTIONS = {
+    'age_range': lambda value: f'{value}岁',
+    'waist_status': lambda value: '腰围正常' if 'normal' in str(value) else '腰围异常',
+    'family_history': lambda value: '无家族病史',
+    'blood_pressure': lambda value: '无高血压',
+    'glucose_history': lambda value: '无血糖异常史',
+}
+
+
+class CompiledQuestionnaire:
+    """
+    编译后的问卷：模块加载时由 QUESTIONNAIRE 构建一次
+    - 取值集合为 frozenset，取值到编码、编码到因素条目均为预先构建的表
+    - 答案按字段顺序编码为混合进制整数键（0 .. combinations-1），用于查表评分
+    - 因素条目和错误条目为共享对象，调用方不应修改
+    """
+
+    def __init__(self, questions):
+        self.questions = tuple(questions)
+        self.fields = tuple(q.field for q in self.questions)
+        self.defaults = tuple(q.default for q in self.questions)
+        self.required = frozenset(self.fields)
+        self.allowed = tuple(frozenset(option.value for option in q.options) for q in self.questions)
+        self.codes = tuple({option.value: i for i, option in enumerate(q.options)} for q in self.questions)
+        self.radices = tuple(len(q.options) for q in self.questions)
+        self.combinations = 1
+        for radix in self.radices:
+            self.combinations *= radix
+        self.factor_entries = tuple(
+            tuple({'score': option.score, 'description': option.description} for option in q.options)
+            for q in self.questions
+        )
+        self.unknown_descriptions = tuple(UNKNOWN_DESCRIPTIONS.get(field, str) for field in self.fields)
+        self.error_entries = tuple({'field': q.field, 'message': q.message} for q in self.questions)
+        self._validators = tuple(zip(self.fields, self.allowed, self.error_entries))
+        self._encoders = tuple(zip(self.fields, self.codes, self.radices))
+
+    def validate(self, data):
+        """
+        校验请求体
+        返回None表示通过，否则返回错误响应体（{"error": ...} 或 {"errors": [...]}）
+        """
+        if not data:
+            return {"error": "请求体不能为空，需要提供JSON格式数据"}
+        if not isinstance(data, dict):
+            return {"error": "请求体必须是JSON对象"}
+        if not self.required.issubset(data):
+            missing = [field for field in self.fields if field not in data]
+            return {"error": f"缺少必填字段: {', '.join(missing)}"}
+
+        # 可选值均为字符串；先判断类型，列表等不可哈希的值不会进入集合查找
+        errors = [
+            entry for field, allowed, entry in self._validators
+            if type(data[field]) is not str or data[field] not in allowed
+        ]
+        return {"errors": errors} if errors else None
+
+    def validate_and_encode(self, data):
+        """
+        校验并编码，返回 (整数键, None) 或 (None, 错误响应体)
+        合法请求只做一次遍历和每字段一次字典查找；任一字段缺失或无效时再走 validate 生成完整的错误信息
+        """
+        if isinstance(data, dict):
+            key = 0
+            try:
+                for field, codes, radix in self._encoders:
+                    key = key * radix + codes[data[field]]
+                return key, None
+            except (KeyError, TypeError):
+                pass
+        return None, self.validate(data)
+
+    def encode(self, data):
+        """将答案编码为整数键（缺失字段使用缺省值），任一字段不在取值范围内时返回None"""
+        key = 0
+        try:
+            for (field, codes, radix), default in zip(self._encoders, self.defaults):
+                key = key * radix + codes[data.get(field, default)]
+        except (KeyError, TypeError):
+            return None
+        return key
+
+    def all_answers(self):
+        """按整数键顺序枚举全部答案组合，每个组合为 {字段: 取值}"""
+        values = [[option.value for option in q.options] for q in self.questions]
+        for combo in itertools.product(*values):
+            yield dict(zip(self.fields, combo))
+
+    def factor(self, index, value):
+        """第index个问题的因素条目；取值无效时得分为0，描述见 UNKNOWN_DESCRIPTIONS"""
+        code = self.codes[index].get(value) if isinstance(value, str) else None
+        if code is None:
+            return {'score': 0, 'description': self.unknown_descriptions[index](value)}
+        return self.factor_entries[index][code]
+
+    def scores(self, field):
+        """字段各取值的得分 {取值: 得分}"""
+        return {option.value: option.score for option in self.questions[self.fields.index(field)].options}
+
+    def descriptions(self, field):
+        """字段各取值的描述 {取值: 描述}"""
+        return {option.value: option.description for option in self.questions[self.fields.index(field)].options}
+
+
+questionnaire = CompiledQuestionnaire(QUESTIONNAIRE)
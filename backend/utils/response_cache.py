@@ -0,0 +1,213 @@
+import gzip
+import hashlib
+import threading
+from collections import namedtuple
+from functools import wraps
+from flask import Response, current_app, request
+from utils.data_loader import dataset_cache
+from utils.counters import Counters
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时只提供gzip
+    brotli = None
+
+# 预先渲染好的响应体：body为未压缩的JSON字节，gzip/br为压缩变体（压缩无收益时为None）
+# etag由响应体摘要得出，数据集版本不变时各进程得到相同的强校验值
+MaterializedResponse = namedtuple('MaterializedResponse', ['body', 'gzip', 'br', 'etag', 'mimetype'])
+
+
+def materialize(body, mimetype='application/json', brotli_quality=11):
+    """
+    将响应体渲染为可直接发送的字节及其压缩变体
+    长期缓存的响应使用最高的brotli压缩级别；只用一次或很快被淘汰的响应可传入较低的 brotli_quality
+    """
+    gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+    compressed = brotli.compress(body, quality=brotli_quality) if brotli is not None else None
+    return MaterializedResponse(
+        body=body,
+        gzip=gzipped if len(gzipped) < len(body) else None,
+        br=compressed if compressed is not None and len(compressed) < len(body) else None,
+        etag=hashlib.sha1(body).hexdigest()[:20],
+        mimetype=mimetype
+    )
+
+
+class ResponseCache:
+    """
+    按数据集版本缓存已序列化的响应体
+    - 键为 (endpoint, 路由参数)，值为 (数据集版本, MaterializedResponse)
+    - 数据集版本变化后，下一次请求重新渲染并替换旧条目
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = Counters(hits=0, misses=0, not_modified=0)
+
+    def lookup(self, key, version):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._stats.incr('hits')
+            return entry[1]
+        return None
+
+    def store(self, key, version, materialized):
+        with self._lock:
+            self._stats.incr('misses')
+            self._entries[key] = (version, materialized)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return dict(self._stats.snapshot(), entries=len(self._entries))
+
+
+response_cache = ResponseCache()
+
+
+def dataset_version(datasets):
+    """计算一组数据集的组合版本号"""
+    return tuple(dataset_cache.get(name).version for name in datasets)
+
+
+def current_dataset_version(datasets):
+    """不访问文件的组合版本号（见 DatasetCache.peek），任一数据集需要检查文件时返回None"""
+    versions = []
+    for name in datasets:
+        snapshot = dataset_cache.peek(name)
+        if snapshot is None:
+            return None
+        versions.append(snapshot.version)
+    return tuple(versions)
+
+
+def negotiate(materialized, accepted=None):
+    """根据Accept-Encoding选择响应体变体，返回 (body, content_encoding)"""
+    if accepted is None:
+        accepted = request.accept_encodings
+    if materialized.br is not None and accepted.quality('br') > 0:
+        return materialized.br, 'br'
+    if materialized.gzip is not None and accepted.quality('gzip') > 0:
+        return materialized.gzip, 'gzip'
+    return materialized.body, None
+
+
+def cache_control_policy(endpoint):
+    """获取路由的缓存策略，未单独配置的路由使用默认策略"""
+    policy = dict(current_app.config['HTTP_CACHE_DEFAULT_POLICY'])
+    policy.update(current_app.config['HTTP_CACHE_POLICIES'].get(endpoint, {}))
+    return policy
+
+
+def apply_cache_headers(response, endpoint):
+    """按路由策略设置Cache-Control"""
+    policy = cache_control_policy(endpoint)
+    if policy.get('no_store'):
+        response.cache_control.no_store = True
+        return response
+    if policy.get('private'):
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = policy.get('max_age', 0)
+    if policy.get('s_maxage') is not None:
+        response.cache_control.s_maxage = policy['s_maxage']
+    if policy.get('stale_while_revalidate'):
+        response.cache_control.stale_while_revalidate = policy['stale_while_revalidate']
+    if policy.get('stale_if_error'):
+        response.cache_control.stale_if_error = policy['stale_if_error']
+    return response
+
+
+def send_materialized(materialized, endpoint=None, accept_encodings=None, if_none_match=None):
+    """
+    直接从内存发送预渲染的响应
+    - 每种内容编码使用独立的强ETag
+    - If-None-Match命中时返回304，不发送响应体
+    - 默认从当前请求读取协商头；不经过Flask请求处理的调用方（asgi.py）显式传入，只需应用上下文
+    """
+    if endpoint is None:
+        endpoint, accept_encodings, if_none_match = request.endpoint, request.accept_encodings, request.if_none_match
+    body, encoding = negotiate(materialized, accept_encodings)
+    etag = materialized.etag + '-' + encoding if encoding else materialized.etag
+
+    if if_none_match.contains(etag) or if_none_match.star_tag:
+        response_cache._stats.incr('not_modified')
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=materialized.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    return apply_cache_headers(response, endpoint)
+
+
+def cache_key(endpoint, view_args):
+    return endpoint, tuple(sorted(view_args.items()))
+
+
+def _render(fn, datasets, endpoint, view_args):
+    """返回缓存的预渲染响应，未命中时执行视图函数并缓存；视图返回Response或元组时原样返回"""
+    key = cache_key(endpoint, view_args)
+    version = dataset_version(datasets)
+    cached = response_cache.lookup(key, version)
+    if cached is None:
+        payload = fn(**view_args)
+        if isinstance(payload, (Response, tuple)):
+            return payload
+        cached = materialize(current_app.json.response(payload).get_data())
+        response_cache.store(key, version, cached)
+    return cached
+
+
+def render_materialized(endpoint, view_args=None):
+    """
+    在当前应用上下文中获取预渲染接口的响应体（不经过HTTP请求），供聚合接口复用
+    返回 MaterializedResponse；视图返回错误响应时返回该响应
+    """
+    view = current_app.view_functions[endpoint]
+    datasets = getattr(view, 'materialized_datasets', None)
+    if datasets is None:
+        raise ValueError("%s 不是预渲染接口" % endpoint)
+    return _render(view.__wrapped__, datasets, endpoint, view_args or {})
+
+
+def materialized(*datasets):
+    """
+    预渲染响应装饰器
+    - 被装饰的视图函数返回可JSON序列化的数据，而不是调用jsonify
+    - 每个数据集版本只执行一次视图函数和序列化，之后直接返回内存中的字节
+    - 视图返回Response或(body, status)元组时（例如404），不做缓存，原样返回
+    - 响应携带ETag和按路由配置的Cache-Control，条件请求命中时返回304
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def decorated_function(*args, **kwargs):
+            cached = _render(fn, datasets, request.endpoint, kwargs)
+            if not isinstance(cached, MaterializedResponse):
+                return cached
+            return send_materialized(cached)
+
+        # 供asgi.py识别可直接从缓存返回的路由
+        decorated_function.materialized_datasets = datasets
+        return decorated_function
+
+    return decorator
+
+
+def warm_materialized(app):
+    """依次请求所有无路由参数的预渲染接口，使响应体在缓存中就绪；返回预渲染的接口数"""
+    urls = [
+        rule.rule for rule in app.url_map.iter_rules()
+        if 'GET' in rule.methods and not rule.arguments
+        and getattr(app.view_functions[rule.endpoint], 'materialized_datasets', None) is not None
+    ]
+    client = app.test_client()
+    for url in urls:
+        client.get(url)
+    return len(urls)
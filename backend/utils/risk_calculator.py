@@ -1,91 +1,55 @@
 import json
 
+from utils.questionnaire import questionnaire
+
+# 以下映射均由问卷定义（utils/questionnaire.py）派生
+# 字段及缺省值（与calculate_risk_score中字段缺失时使用的值一致）
+FIELD_DEFAULTS = tuple(zip(questionnaire.fields, questionnaire.defaults))
+# 各字段的可选值
+VALID_VALUES = {q.field: [option.value for option in q.options] for q in questionnaire.questions}
+AGE_SCORES = questionnaire.scores('age_range')
+BMI_DESCRIPTIONS = questionnaire.descriptions('bmi_category')
+ACTIVITY_DESCRIPTIONS = questionnaire.descriptions('physical_activity')
+
+# 风险等级的总分下限
+HIGH_RISK_SCORE = 17
+MEDIUM_RISK_SCORE = 10
+
+# 个性化建议：(因素, 最低得分, 建议)，因素得分不低于最低得分时给出，按表中顺序排列
+SUGGESTION_RULES = (
+    ('bmi', 3, ("控制饮食，减少热量摄入，增加蔬菜和水果的比例",
+                "在医生指导下制定科学的减重计划")),
+    ('waist', 1, ("避免久坐，定期起身活动",
+                  "增加腹部锻炼，如平板支撑、仰卧起坐等")),
+    ('activity', 1, ("增加运动量，每周至少进行150分钟中等强度有氧运动",
+                     "选择适合自己的运动方式，如快走、游泳、骑自行车等")),
+    ('blood_pressure', 1, ("减少盐的摄入，每天不超过5克",
+                           "定期监测血压，如有需要及时就医")),
+    ('glucose', 1, ("定期检测血糖，遵医嘱进行治疗",
+                    "避免高糖食物，选择低GI食物")),
+)
+# 没有触发任何规则时的通用建议
+GENERAL_SUGGESTIONS = ("保持健康的生活方式，均衡饮食，适量运动", "定期体检，关注血糖变化")
+# 按风险等级追加的建议
+LEVEL_SUGGESTIONS = {
+    'high': "建议尽快咨询医生，进行全面的健康检查",
+    'medium': "建议3-6个月内进行一次血糖检测"
+}
+MAX_SUGGESTIONS = 5
+
 def calculate_risk_score(data):
     """
     根据用户数据计算糖尿病风险评分
     新算法支持7个输入字段：age_range, bmi_category, waist_status, 
     family_history, physical_activity, blood_pressure, glucose_history
+    各字段的得分和描述见问卷定义
     """
     risk_score = 0
     factors = {}
-    
-    # 年龄评分
-    age_scores = {
-        "20-39": 0, "40-49": 2, "50-59": 3,
-        "60-69": 4, "70+": 5
-    }
-    age_range = data.get('age_range', '20-39')
-    age_score = age_scores.get(age_range, 0)
-    risk_score += age_score
-    factors['age'] = {
-        'score': age_score,
-        'description': age_range + '岁'
-    }
-    
-    # BMI评分
-    bmi_scores = {
-        "underweight": 0, "normal": 1,
-        "overweight": 3, "obese": 5
-    }
-    bmi_category = data.get('bmi_category', 'normal')
-    bmi_score = bmi_scores.get(bmi_category, 0)
-    risk_score += bmi_score
-    factors['bmi'] = {
-        'score': bmi_score,
-        'description': get_bmi_description(bmi_category)
-    }
-    
-    # 腰围状态评分
-    waist_scores = {
-        "normal-male": 0, "normal-female": 0,
-        "abnormal-male": 3, "abnormal-female": 3
-    }
-    waist_status = data.get('waist_status', 'normal-male')
-    waist_score = waist_scores.get(waist_status, 0)
-    risk_score += waist_score
-    factors['waist'] = {
-        'score': waist_score,
-        'description': '腰围正常' if 'normal' in waist_status else '腰围异常'
-    }
-    
-    # 家族病史评分
-    family_history = data.get('family_history', 'no')
-    family_score = 3 if family_history == 'yes' else 0
-    risk_score += family_score
-    factors['family'] = {
-        'score': family_score,
-        'description': '有家族病史' if family_history == 'yes' else '无家族病史'
-    }
-    
-    # 运动频率评分
-    activity_scores = {
-        "regular": 0, "irregular": 2, "sedentary": 4
-    }
-    physical_activity = data.get('physical_activity', 'regular')
-    activity_score = activity_scores.get(physical_activity, 0)
-    risk_score += activity_score
-    factors['activity'] = {
-        'score': activity_score,
-        'description': get_activity_description(physical_activity)
-    }
-    
-    # 高血压评分
-    blood_pressure = data.get('blood_pressure', 'no')
-    bp_score = 3 if blood_pressure == 'yes' else 0
-    risk_score += bp_score
-    factors['blood_pressure'] = {
-        'score': bp_score,
-        'description': '有高血压' if blood_pressure == 'yes' else '无高血压'
-    }
-    
-    # 血糖异常史评分
-    glucose_history = data.get('glucose_history', 'no')
-    glucose_score = 5 if glucose_history == 'yes' else 0
-    risk_score += glucose_score
-    factors['glucose'] = {
-        'score': glucose_score,
-        'description': '有血糖异常史' if glucose_history == 'yes' else '无血糖异常史'
-    }
+    for index, question in enumerate(questionnaire.questions):
+        entry = questionnaire.factor(index, data.get(question.field, question.default))
+        factors[question.factor] = dict(entry)
+        risk_score += entry['score']
     
     # 确定风险等级和百分比
     risk_level, risk_percentage = determine_risk_level(risk_score)
@@ -103,71 +67,114 @@ def calculate_risk_score(data):
 
 def get_bmi_description(bmi_category):
     """获取BMI分类的中文描述"""
-    descriptions = {
-        "underweight": "偏瘦",
-        "normal": "正常",
-        "overweight": "超重",
-        "obese": "肥胖"
-    }
-    return descriptions.get(bmi_category, bmi_category)
+    return BMI_DESCRIPTIONS.get(bmi_category, bmi_category)
 
 def get_activity_description(activity_level):
     """获取运动频率的中文描述"""
-    descriptions = {
-        "regular": "规律运动",
-        "irregular": "运动不规律",
-        "sedentary": "久坐不动"
-    }
-    return descriptions.get(activity_level, activity_level)
+    return ACTIVITY_DESCRIPTIONS.get(activity_level, activity_level)
 
 def determine_risk_level(score):
     """根据评分确定风险等级和百分比"""
-    if score >= 17:
-        return 'high', min(95 + (score - 17) * 1, 100)
-    elif score >= 10:
-        return 'medium', 40 + (score - 10) * 5
+    if score >= HIGH_RISK_SCORE:
+        return 'high', min(95 + (score - HIGH_RISK_SCORE) * 1, 100)
+    elif score >= MEDIUM_RISK_SCORE:
+        return 'medium', 40 + (score - MEDIUM_RISK_SCORE) * 5
     else:
         return 'low', min(20 + score * 2, 39)
 
+def suggestion_triggers(factors):
+    """各条建议规则是否触发（建议只取决于触发情况和风险等级）"""
+    return tuple(factors.get(factor, {}).get('score', 0) >= minimum for factor, minimum, _ in SUGGESTION_RULES)
+
 def generate_suggestions(factors, risk_level):
     """根据风险因素和等级生成个性化建议"""
     suggestions = []
-    
-    # 基于BMI的建议
-    if factors.get('bmi', {}).get('score', 0) >= 3:
-        suggestions.append("控制饮食，减少热量摄入，增加蔬菜和水果的比例")
-        suggestions.append("在医生指导下制定科学的减重计划")
-    
-    # 基于腰围的建议
-    if factors.get('waist', {}).get('score', 0) > 0:
-        suggestions.append("避免久坐，定期起身活动")
-        suggestions.append("增加腹部锻炼，如平板支撑、仰卧起坐等")
-    
-    # 基于运动的建议
-    if factors.get('activity', {}).get('score', 0) > 0:
-        suggestions.append("增加运动量，每周至少进行150分钟中等强度有氧运动")
-        suggestions.append("选择适合自己的运动方式，如快走、游泳、骑自行车等")
-    
-    # 基于高血压的建议
-    if factors.get('blood_pressure', {}).get('score', 0) > 0:
-        suggestions.append("减少盐的摄入，每天不超过5克")
-        suggestions.append("定期监测血压，如有需要及时就医")
-    
-    # 基于血糖异常史的建议
-    if factors.get('glucose', {}).get('score', 0) > 0:
-        suggestions.append("定期检测血糖，遵医嘱进行治疗")
-        suggestions.append("避免高糖食物，选择低GI食物")
+    for triggered, (_, _, texts) in zip(suggestion_triggers(factors), SUGGESTION_RULES):
+        if triggered:
+            suggestions.extend(texts)
     
     # 通用建议
     if not suggestions:
-        suggestions.append("保持健康的生活方式，均衡饮食，适量运动")
-        suggestions.append("定期体检，关注血糖变化")
+        suggestions.extend(GENERAL_SUGGESTIONS)
     
     # 根据风险等级调整建议
-    if risk_level == 'high':
-        suggestions.append("建议尽快咨询医生，进行全面的健康检查")
-    elif risk_level == 'medium':
-        suggestions.append("建议3-6个月内进行一次血糖检测")
+    if risk_level in LEVEL_SUGGESTIONS:
+        suggestions.append(LEVEL_SUGGESTIONS[risk_level])
     
     # 限制建议数量
-    return suggestions[:5]
\ No newline at end of file
+    return suggestions[:MAX_SUGGESTIONS]
+
+def validate_risk_input(data):
+    """
+    校验风险评估输入
+    返回None表示通过，否则返回错误响应体（{"error": ...} 或 {"errors": [...]}）
+    """
+    return questionnaire.validate(data)
+
+def score_batch(records):
+    """
+    批量计算风险评分
+    - 按列查表得到各项因素条目（问卷编译时构建，所有结果共享，调用方不应修改）
+    - 风险等级按总分、建议按触发条件组合复用计算结果
+    - 每条结果与 calculate_risk_score(record) 一致
+    """
+    age, bmi, waist, family, activity, bp, glucose = (
+        [questionnaire.factor(index, record.get(question.field, question.default)) for record in records]
+        for index, question in enumerate(questionnaire.questions)
+    )
+
+    levels = {}
+    suggestion_cache = {}
+    results = []
+    for row in zip(age, bmi, waist, family, activity, bp, glucose):
+        a, b, w, f, act, p, g = row
+        risk_score = a['score'] + b['score'] + w['score'] + f['score'] + act['score'] + p['score'] + g['score']
+        factors = {'age': a, 'bmi': b, 'waist': w, 'family': f, 'activity': act, 'blood_pressure': p, 'glucose': g}
+
+        if risk_score not in levels:
+            levels[risk_score] = determine_risk_level(risk_score)
+        risk_level, risk_percentage = levels[risk_score]
+
+        # 建议只取决于以下条件和风险等级
+        key = (suggestion_triggers(factors), risk_level)
+        if key not in suggestion_cache:
+            suggestion_cache[key] = generate_suggestions(factors, risk_level)
+
+        results.append({
+            'risk_score': risk_score,
+            'risk_percentage': risk_percentage,
+            'risk_level': risk_level,
+            'risk_factors': factors,
+            'suggestions': list(suggestion_cache[key])
+        })
+    return results
+
+def assess_batch(records, chunk_size=1000, max_records=None, score=score_batch):
+    """
+    逐块校验并评分，以生成器形式返回结果，便于流式输出
+    - records 可以是列表或任意可迭代对象（例如逐行解析的NDJSON）
+    - score 为批量评分函数，默认按列计算，可替换为查表实现
+    - 每条输出包含 index；校验失败的记录输出错误信息，不影响其他记录
+    """
+    chunk = []
+
+    def flush(chunk):
+        valid = [(index, record) for index, record, errors in chunk if errors is None]
+        scored = iter(score([record for _, record in valid]))
+        for index, record, errors in chunk:
+            if errors is None:
+                yield dict(next(scored), index=index)
+            else:
+                yield dict(errors, index=index)
+
+    for index, record in enumerate(records):
+        if max_records is not None and index >= max_records:
+            yield from flush(chunk)
+            chunk = []
+            yield {"index": index, "error": f"超过单次批量评估上限（{max_records}条）"}
+            return
+        chunk.append((index, record, validate_risk_input(record)))
+        if len(chunk) >= chunk_size:
+            yield from flush(chunk)
+            chunk = []
+    yield from flush(chunk)
@@ -0,0 +1,50 @@
+import logging
+from datetime import datetime
+from models import db, RiskAssessment
+from utils.assessment_writer import assessment_writer, WriterBusyError
+from utils.log_config import debug_trace
+from utils.questionnaire import questionnaire
+from utils.risk_table import lookup_risk_key
+
+logger = logging.getLogger(__name__)
+
+
+def assess_and_record(data):
+    """
+    单次风险评估：校验、查表评分并提交写入，返回 (响应数据, HTTP状态码)
+    Flask路由 /api/risk/assess 与ASGI异步路由（asgi.py）共用，需在应用上下文中调用
+    """
+    try:
+        # 请求体验证，同时将答案编码为查找表的整数键
+        key, validation_error = questionnaire.validate_and_encode(data)
+        if validation_error:
+            logger.warning("风险评估输入验证失败: %s", validation_error)
+            return validation_error, 400
+
+        # 计算风险评分（查表）
+        result = lookup_risk_key(key)
+
+        # 保存评估结果（未登录用户不绑定user_id）
+        # 由后台线程批量写入，这里只分配评估ID，不等待数据库提交
+        assessment_date = datetime.utcnow()
+        assessment_id = assessment_writer.submit(
+            risk_score=result['risk_score'],
+            risk_level=result['risk_level'],
+            assessment_date=assessment_date,
+            **RiskAssessment.structured_fields(data, result['risk_factors'])
+        )
+
+        # 添加评估时间和评估ID
+        result['assessment_date'] = assessment_date.isoformat()
+        result['assessment_id'] = assessment_id  # 返回评估记录ID，便于前端追踪
+
+        if debug_trace(logger):
+            logger.debug("风险评估完成，评分: %s，等级: %s", result['risk_score'], result['risk_level'])
+        return result, 200
+    except WriterBusyError:
+        logger.warning("评估结果写入队列已满")
+        return {"error": "服务繁忙，请稍后重试"}, 503
+    except Exception as e:
+        logger.exception("风险评估过程中发生错误: %s", e)
+        db.session.rollback()
+        return {"error": "评估过程中发生错误，请稍后重试"}, 500
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import time
+from utils import risk_calculator
+from utils.questionnaire import QUESTIONNAIRE, questionnaire
+from utils.risk_calculator import calculate_risk_score, score_batch
+
+logger = logging.getLogger(__name__)
+
+
+def weights_version():
+    """
+    根据评分规则的声明式定义计算版本号：问卷（取值、得分、描述）、风险等级划分和建议规则表
+    风险等级按所有可能的总分展开，百分比公式的变化也会得到新的版本
+    """
+    max_score = sum(max(option.score for option in q.options) for q in QUESTIONNAIRE)
+    source = json.dumps({
+        'questionnaire': QUESTIONNAIRE,
+        'levels': [risk_calculator.determine_risk_level(score) for score in range(max_score + 1)],
+        'suggestions': {
+            'rules': risk_calculator.SUGGESTION_RULES,
+            'general': risk_calculator.GENERAL_SUGGESTIONS,
+            'levels': risk_calculator.LEVEL_SUGGESTIONS,
+            'max': risk_calculator.MAX_SUGGESTIONS
+        }
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+
+
+class RiskLookupTable:
+    """
+    问卷全部答案组合的评分结果表
+    - 7个字段共 5*4*4*2*3*2*2 = 1920 种组合，启动时全部预先计算
+    - 答案按问卷编译得到的混合进制整数键（questionnaire.encode）索引，查询为一次列表下标访问
+    """
+
+    def __init__(self):
+        self._entries = []
+        self.version = None
+        self.build_ms = 0.0
+        self.lookup_ns = None
+
+    def encode(self, data):
+        """将答案编码为整数键，任一字段不在取值范围内时返回None"""
+        return questionnaire.encode(data)
+
+    def build(self):
+        started = time.perf_counter()
+        self._entries = score_batch(list(questionnaire.all_answers()))
+        self.version = weights_version()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 3)
+        return self
+
+    def lookup(self, data):
+        """
+        查表获取评分结果，与 calculate_risk_score(data) 一致
+        - 返回顶层字典的副本，调用方可以添加字段；risk_factors 和 suggestions 为共享对象，不应修改
+        - 答案不在取值范围内时退回逐项计算
+        """
+        key = questionnaire.encode(data)
+        if key is None:
+            return calculate_risk_score(data)
+        return self.lookup_key(key)
+
+    def lookup_key(self, key):
+        """按整数键（questionnaire.validate_and_encode 的结果）获取评分结果，返回值同 lookup"""
+        if not self._entries:
+            ensure_risk_table()
+        return dict(self._entries[key])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+risk_table = RiskLookupTable()
+
+
+def lookup_risk_score(data):
+    """O(1)查表评分"""
+    return risk_table.lookup(data)
+
+
+def lookup_risk_key(key):
+    """按已校验的整数键查表评分"""
+    return risk_table.lookup_key(key)
+
+
+def lookup_risk_scores(records):
+    """批量查表评分，可作为 assess_batch 的 score 参数"""
+    lookup = risk_table.lookup
+    return [lookup(record) for record in records]
+
+
+def ensure_risk_table(benchmark_iterations=10000):
+    """
+    确保查找表与当前评分规则一致，版本变化时重新构建
+    构建后记录构建耗时和单次查询延迟
+    """
+    if risk_table.version == weights_version():
+        return risk_table
+
+    risk_table.build()
+    sample = {q.field: q.options[-1].value for q in QUESTIONNAIRE}
+    started = time.perf_counter()
+    for _ in range(benchmark_iterations):
+        risk_table.lookup(sample)
+    risk_table.lookup_ns = round((time.perf_counter() - started) / benchmark_iterations * 1e9)
+    logger.info("风险评分查找表已构建: 版本 %s，%d 条，耗时 %.3f ms，单次查询 %d ns",
+                risk_table.version, len(risk_table), risk_table.build_ms, risk_table.lookup_ns)
+    return risk_table
+
+
+def risk_table_stats():
+    return {
+        'version': risk_table.version,
+        'entries': len(risk_table),
+        'build_ms': risk_table.build_ms,
+        'lookup_ns': risk_table.lookup_ns
+    }
@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import threading
+from werkzeug.security import safe_join
+from utils.response_cache import MaterializedResponse, materialize
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时只生成gzip
+    brotli = None
+
+# 构建时按内容哈希重命名的资源类型（HTML中的引用同步改写），及需要预压缩的类型
+FINGERPRINT_EXTENSIONS = ('.css', '.js')
+COMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.json', '.txt')
+PRECOMPRESSED_SUFFIXES = ('.gz', '.br')
+MANIFEST_NAME = 'manifest.json'
+
+# 文件名中的内容哈希：name.0123456789.css
+FINGERPRINT_PATTERN = re.compile(r'\.[0-9a-f]{10}\.[A-Za-z0-9]+$')
+# HTML中对本地css/js的引用（跳过带协议的外部地址）
+REFERENCE_PATTERN = re.compile(r'''(\b(?:href|src)\s*=\s*["'])([^"':?#]+\.(?:css|js))(["'])''')
+
+
+def is_fingerprinted(filename):
+    return FINGERPRINT_PATTERN.search(filename) is not None
+
+
+def _fingerprint(name, content):
+    stem, ext = os.path.splitext(name)
+    return '%s.%s%s' % (stem, hashlib.sha1(content).hexdigest()[:10], ext)
+
+
+def _source_files(source_dir, exclude):
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and os.path.abspath(os.path.join(root, d)) not in exclude)
+        for name in sorted(files):
+            if not name.startswith('.'):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, source_dir).replace(os.sep, '/'), path
+
+
+def _write_compressed(path, content, stats):
+    """写入 .gz 和 .br 预压缩文件，压缩无收益时不生成"""
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            stats[suffix[1:] + '_bytes'] += len(compressed)
+
+
+def build_assets(source_dir, output_dir):
+    """
+    构建前端静态资源到 output_dir
+    - css/js 按内容哈希重命名（name.<哈希>.css），HTML中的引用改写为新文件名，可长期缓存
+    - 文本资源生成 .gz（以及安装了brotli时的 .br）预压缩文件
+    - 先写入临时目录再整体替换，服务中的进程不会读到构建到一半的文件
+    返回构建统计，manifest.json 记录原文件名到哈希文件名的映射
+    """
+    output_dir = os.path.abspath(output_dir)
+    # 构建目录可以位于源目录内（默认 frontend/dist），遍历时排除构建目录及其临时目录
+    files = list(_source_files(source_dir, {output_dir, output_dir + '.tmp', output_dir + '.old'}))
+
+    manifest = {}
+    contents = {}
+    for name, path in files:
+        with open(path, 'rb') as f:
+            contents[name] = f.read()
+        if name.endswith(FINGERPRINT_EXTENSIONS):
+            manifest[name] = _fingerprint(name, contents[name])
+
+    def rewrite(html_name, content):
+        base = os.path.dirname(html_name)
+
+        def replace(match):
+            target = os.path.normpath(os.path.join(base, match.group(2))).replace(os.sep, '/')
+            if target not in manifest:
+                return match.group(0)
+            return match.group(1) + os.path.relpath(manifest[target], base or '.').replace(os.sep, '/') + match.group(3)
+
+        return REFERENCE_PATTERN.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+    staging = output_dir + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    stats = {'files': 0, 'bytes': 0, 'gz_bytes': 0, 'br_bytes': 0}
+    for name, _ in files:
+        content = contents[name]
+        if name.endswith('.html'):
+            content = rewrite(name, content)
+        target = os.path.join(staging, manifest.get(name, name))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        stats['files'] += 1
+        stats['bytes'] += len(content)
+        if name.endswith(COMPRESS_EXTENSIONS):
+            _write_compressed(target, content, stats)
+
+    with open(os.path.join(staging, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    previous = output_dir + '.old'
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.isdir(output_dir):
+        os.replace(output_dir, previous)
+    os.replace(staging, output_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    return dict(stats, fingerprinted=len(manifest))
+
+
+class StaticAssets:
+    """
+    前端静态资源
+    - 优先从构建目录读取，使用构建时生成的预压缩文件；构建目录中没有的文件读取源目录，在首次请求时压缩
+    - 每个文件读取一次后以 MaterializedResponse 缓存在内存中，文件变化（mtime/大小）后重新读取
+    """
+
+    def __init__(self):
+        self.source_dir = None
+        self.build_dir = None
+        self.immutable_max_age = 31536000
+        self._entries = {}   # 路径 -> (文件签名, MaterializedResponse)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.source_dir = app.config['STATIC_SOURCE_DIR']
+        self.build_dir = app.config['STATIC_BUILD_DIR']
+        self.immutable_max_age = app.config['STATIC_IMMUTABLE_MAX_AGE']
+
+    def get(self, filename):
+        """获取资源，文件不存在或路径不安全时返回None"""
+        if filename.endswith(PRECOMPRESSED_SUFFIXES) or filename == MANIFEST_NAME:
+            return None
+        # 构建目录中没有的文件（如构建前发布的页面引用的原始css文件名）从源目录读取
+        for root, built in ((self.build_dir, True), (self.source_dir, False)):
+            path = safe_join(root, filename)
+            if path is not None and os.path.isfile(path):
+                break
+        else:
+            return None
+
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        with open(path, 'rb') as f:
+            body = f.read()
+        if built:
+            asset = MaterializedResponse(
+                body=body,
+                gzip=self._read_optional(path + '.gz'),
+                br=self._read_optional(path + '.br'),
+                etag=hashlib.sha1(body).hexdigest()[:20],
+                mimetype=mimetype
+            )
+        else:
+            asset = materialize(body, mimetype)
+        with self._lock:
+            self._entries[path] = (signature, asset)
+        return asset
+
+    @staticmethod
+    def _read_optional(path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def apply_immutable(self, response):
+        """带内容哈希的资源内容永不变化：长期缓存且无需重新验证"""
+        response.cache_control.public = True
+        response.cache_control.max_age = self.immutable_max_age
+        response.cache_control.immutable = True
+        response.cache_control.stale_while_revalidate = None
+        return response
+
+
+static_assets = StaticAssets()
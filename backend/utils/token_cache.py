@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask_jwt_extended import decode_token
+from flask_login import UserMixin
+from utils.counters import Counters
+
+
+class TokenIdentity(UserMixin):
+    """
+    仅由JWT声明构成的用户身份，不访问数据库
+    - 提供 id、username 和资料版本号 profile_version，可作为 current_user 使用
+    - 访问其他用户字段会抛出 AttributeError，需要完整用户信息的路由不应使用 claims_only 模式
+    """
+
+    def __init__(self, id, username, profile_version=None):
+        self.id = id
+        self.username = username
+        self.profile_version = profile_version
+
+    def __repr__(self):
+        return '<TokenIdentity %s %s>' % (self.id, self.username)
+
+
+class TokenVerificationCache:
+    """
+    已验证JWT的缓存
+    - 键为令牌的SHA-256摘要，值为验证通过的声明；签名只在首次出现时校验一次
+    - 每个条目在令牌的 exp 时间失效，过期令牌不会因为缓存而继续有效
+    - LRU淘汰，容量有上限
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()   # 令牌摘要 -> (exp, 声明)
+        self._lock = threading.Lock()
+        self._stats = Counters(hits=0, misses=0, expired=0, evictions=0)
+
+    def init_app(self, app):
+        self.maxsize = app.config['JWT_VERIFY_CACHE_SIZE']
+
+    def verify(self, token):
+        """返回令牌的声明；令牌无效或已过期时抛出与 verify_jwt_in_request 相同的异常"""
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats.incr('hits')
+                    return entry[1]
+                del self._entries[key]
+                self._stats.incr('expired')
+
+        # decode_token 校验签名、exp 以及 JWT_DECODE_* 配置，失败时抛出异常
+        claims = decode_token(token)
+        self._stats.incr('misses')
+        exp = claims.get('exp')
+        if exp is None:
+            return claims
+        with self._lock:
+            self._entries[key] = (exp, claims)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats.incr('evictions')
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return dict(self._stats.snapshot(), entries=len(self._entries), maxsize=self.maxsize)
+
+
+token_cache = TokenVerificationCache()
@@ -0,0 +1,146 @@
+import csv
+import json
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from models import db, User
+from utils.password_hasher import password_hasher
+
+# 唯一约束冲突时返回给客户端的错误信息，顺序即检测顺序
+CONFLICT_MESSAGES = (
+    ('username', '用户名已存在'),
+    ('email', '邮箱已存在')
+)
+IMPORT_FIELDS = ('username', 'email', 'password')
+FIELD_LIMITS = {'username': 80, 'email': 120}
+
+
+def conflict_message(error):
+    """
+    从唯一约束冲突异常中识别冲突的字段，返回对应的错误信息
+    数据库错误信息中通常包含列名或约束名（SQLite: UNIQUE constraint failed: user.email）
+    """
+    detail = str(getattr(error, 'orig', error))
+    for field, message in CONFLICT_MESSAGES:
+        if field in detail:
+            return message
+    return '用户名或邮箱已存在'
+
+
+def validate_user_row(row):
+    """校验并规范化一行用户数据，返回 (数据, 错误信息)"""
+    if not isinstance(row, dict):
+        return None, '每条记录必须是JSON对象'
+    user = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None, '缺少字段: %s' % field
+        user[field] = value if field == 'password' else value.strip()
+    for field, limit in FIELD_LIMITS.items():
+        if len(user[field]) > limit:
+            return None, '%s 长度不能超过%d' % (field, limit)
+    if '@' not in user['email']:
+        return None, '邮箱格式无效'
+    return user, None
+
+
+def _existing_values(column, values, chunk_size):
+    """分块查询数据库中已存在的值（IN列表长度受数据库参数上限限制）"""
+    existing = set()
+    values = list(values)
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        existing.update(db.session.execute(select(column).where(column.in_(chunk))).scalars())
+    return existing
+
+
+def _insert_rows(rows):
+    """
+    插入一块用户；块内出现并发冲突时回退为逐行插入（每行一个保存点）
+    返回 [(行序号, 错误信息)]
+    """
+    values = [{'username': r['username'], 'email': r['email'], 'password_hash': r['password_hash']} for r in rows]
+    try:
+        db.session.execute(insert(User), values)
+        db.session.commit()
+        return []
+    except IntegrityError:
+        db.session.rollback()
+
+    errors = []
+    for row, value in zip(rows, values):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(User), [value])
+        except IntegrityError as e:
+            errors.append((row['index'], conflict_message(e)))
+    db.session.commit()
+    return errors
+
+
+def import_users(records, chunk_size=500):
+    """
+    批量创建用户
+    - 先校验全部记录，并排除批次内重复及数据库中已存在的用户名/邮箱
+    - 有效记录按 chunk_size 分块：每块的密码在哈希进程池中并行计算，然后一条多行INSERT、一个事务写入
+    - 单行失败不影响其他行，返回逐行错误报告
+    """
+    errors = []
+    valid = []
+    seen = {'username': set(), 'email': set()}
+    for index, record in enumerate(records):
+        user, error = validate_user_row(record)
+        if error is None:
+            for field, message in CONFLICT_MESSAGES:
+                if user[field] in seen[field]:
+                    error = '批次内重复: %s' % message
+                    break
+        if error is not None:
+            username = record.get('username') if isinstance(record, dict) else None
+            errors.append({'index': index, 'username': username, 'error': error})
+            continue
+        seen['username'].add(user['username'])
+        seen['email'].add(user['email'])
+        user['index'] = index
+        valid.append(user)
+
+    existing = {
+        'username': _existing_values(User.username, seen['username'], chunk_size),
+        'email': _existing_values(User.email, seen['email'], chunk_size)
+    }
+    pending = []
+    for user in valid:
+        for field, message in CONFLICT_MESSAGES:
+            if user[field] in existing[field]:
+                errors.append({'index': user['index'], 'username': user['username'], 'error': message})
+                break
+        else:
+            pending.append(user)
+
+    created = 0
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        hashes = password_hasher.hash_many(user.pop('password') for user in chunk)
+        for user, pwhash in zip(chunk, hashes):
+            user['password_hash'] = pwhash
+        failed = _insert_rows(chunk)
+        created += len(chunk) - len(failed)
+        usernames = {user['index']: user['username'] for user in chunk}
+        errors.extend({'index': index, 'username': usernames[index], 'error': error} for index, error in failed)
+
+    errors.sort(key=lambda e: e['index'])
+    return {
+        'total': len(records),
+        'created': created,
+        'failed': len(errors),
+        'errors': errors
+    }
+
+
+def read_user_file(stream, file_format):
+    """读取用户导入文件：csv（表头包含 username,email,password）、json（数组）或 ndjson"""
+    if file_format == 'csv':
+        return list(csv.DictReader(stream))
+    if file_format == 'json':
+        return json.load(stream)
+    return [json.loads(line) for line in stream if line.strip()]
@@ -0,0 +1,41 @@
+"""
+生产环境WSGI入口，配合 gunicorn.conf.py 使用：
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+在主进程中导入时（preload_app）完成一次性初始化：建表与结构升级、解析全部数据集、预渲染数据接口。
+工作进程通过fork以写时复制方式共享这些数据，不再各自解析JSON。
+"""
+import gc
+import os
+import threading
+from app import create_app
+from models import db, upgrade_schema
+from utils.data_loader import dataset_cache
+from utils.response_cache import warm_materialized
+
+# 主进程重新加载数据集期间不允许fork，避免工作进程继承被持有的锁或加载到一半的状态
+# （放在这里而不是gunicorn.conf.py中：SIGHUP时配置文件会重新执行，钩子会被重复注册）
+reload_lock = threading.Lock()
+os.register_at_fork(before=reload_lock.acquire,
+                    after_in_parent=reload_lock.release,
+                    after_in_child=reload_lock.release)
+
+
+def preload(app):
+    """主进程初始化，返回 (数据集版本, 预渲染接口数)"""
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        # 主进程不保留数据库连接，避免与工作进程共享同一个连接
+        for engine in db.engines.values():
+            engine.dispose()
+    versions = dataset_cache.versions()
+    warmed = warm_materialized(app)
+    # 初始化产生的对象移入永久代，工作进程的GC不再扫描（写入）这些对象所在的内存页
+    gc.freeze()
+    return versions, warmed
+
+
+application = create_app()
+preload(application)